@@ -0,0 +1 @@
+"""Clowder agents: the core agent loop and its supporting pieces."""
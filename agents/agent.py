@@ -0,0 +1,384 @@
+"""The core agent loop.
+
+An Agent drives a local Ollama model: each iteration it builds a context
+prompt, asks the model for a JSON action list, executes the actions through
+the ToolRegistry, and feeds the results back into the next context.
+"""
+
+import hashlib
+import logging
+from collections import deque
+import re
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import orjson
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Optional
+
+import requests
+
+from .schema import LLMResponse, ValidationError, decode_llm_response
+
+logger = logging.getLogger(__name__)
+
+OLLAMA_CHAT_URL = "http://localhost:11434/api/chat"
+
+# Single fused pattern for stray ANSI escapes and markdown fences, compiled
+# once. format=json responses normally need no cleanup, so this only runs on
+# the fallback path when a direct parse fails.
+_CLEAN_RE = re.compile(r"\x1b\[[0-9;?]*[a-zA-Z]|```(?:json)?\s*\n?")
+
+_ACTION_REF_RE = re.compile(r"\{\{actions\[(\d+)\]\}\}")
+
+
+def _has_template(args: dict) -> bool:
+    """True if any string in *args* contains a ``{{...}}`` template.
+
+    The substring scan over orjson's bytes output runs entirely in C
+    (memmem), so the common no-template case costs one serialize + one
+    memory scan.
+    """
+    return b"{{" in orjson.dumps(args, default=str)
+
+
+class Agent:
+    """Iterative tool-calling agent backed by a local Ollama model."""
+
+    def __init__(
+        self,
+        task: str,
+        tool_registry,
+        model: str = "qwen2.5-coder:7b",
+        max_iterations: int = 50,
+        timeout_seconds: int = 600,
+        num_ctx: int = 8192,
+        temperature: float = 0.0,
+        cache_path: str = ".agent_cache.db",
+        history_path: Optional[str] = None,
+    ) -> None:
+        self.task = task
+        self.tool_registry = tool_registry
+        self.model = model
+        self.max_iterations = max_iterations
+        self.timeout_seconds = timeout_seconds
+        self.num_ctx = num_ctx
+        self.temperature = temperature
+        self.iteration = 0
+        # Only the last few entries feed the context, so the in-memory
+        # history is a bounded ring; the full record, if wanted, streams to
+        # a JSONL sidecar instead of growing O(iterations) in memory.
+        self.action_history: deque = deque(maxlen=8)
+        self.history_path = history_path
+        self._history_file = open(history_path, "ab") if history_path else None
+        # Wall clock only for human-facing timestamps; the timeout check
+        # uses the monotonic clock so NTP/DST jumps can't break it.
+        self.started_at: Optional[datetime] = None
+        self._start_monotonic: Optional[float] = None
+        # One session for the whole run: keeps the TCP connection alive and
+        # lets Ollama keep the model (and its KV cache) resident between
+        # iterations instead of paying load/warmup cost per call.
+        self._session = requests.Session()
+        # Canonicalize the workspace once: a stable absolute form keeps the
+        # prompt prefix and cache keys from fragmenting on ./foo vs /abs/foo.
+        self._workspace_path = (
+            str(Path(self.tool_registry.allowed_paths[0]).resolve())
+            if self.tool_registry.allowed_paths
+            else "."
+        )
+        # The static prompt prefix must be byte-identical across iterations
+        # so Ollama can reuse the shared-prefix KV cache; build it once.
+        self._prefix = self._static_prefix()
+        # Content-addressed response cache: only meaningful when generation
+        # is deterministic, so it is bypassed for temperature > 0.
+        self._cache_db = sqlite3.connect(cache_path)
+        self._cache_db.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            "key TEXT PRIMARY KEY, response TEXT, created_at REAL)"
+        )
+
+    # ------------------------------------------------------------------
+    # Context construction
+    # ------------------------------------------------------------------
+
+    def _static_prefix(self) -> str:
+        """Everything that is constant for the lifetime of the run.
+
+        Sent as the system message every iteration; sorting allowed_paths
+        keeps the bytes deterministic so the prefix KV cache never misses.
+        """
+        workspace_path = self._workspace_path
+        return "\n".join(
+            [
+                "OUTPUT RAW JSON ONLY. No prose, no markdown fences.",
+                f"TASK: {self.task}",
+                f"WORKSPACE: {workspace_path}",
+                f"TOOLS: {self.tool_registry.describe()}",
+                "SCHEMA: {\"reasoning\": \"...\", \"actions\": [{\"tool\": \"...\", \"args\": {...}}]}",
+                "CHAINING: reference an earlier action's result with {{actions[N]}} (0-based).",
+                f"PATH RULES: all paths must stay inside {workspace_path}.",
+                "Call the 'finish' tool with a summary when the task is complete.",
+            ]
+        )
+
+    def _recent_block(self) -> str:
+        """The sliding window of recent history — the only part of the
+        prompt that changes shape between iterations."""
+        if not self.action_history:
+            return ""
+        recent = list(self.action_history)[-3:]
+        lines = ["RECENT:"]
+        lines.extend(orjson.dumps(entry, default=str).decode() for entry in recent)
+        lines.append("")
+        return "\n".join(lines)
+
+    def _dynamic_suffix(self) -> str:
+        """The per-iteration tail: iteration counter plus recent history."""
+        return (
+            f"ITERATION: {self.iteration}/{self.max_iterations}\n"
+            f"{self._recent_block()}OUTPUT JSON NOW:"
+        )
+
+    # ------------------------------------------------------------------
+    # LLM call
+    # ------------------------------------------------------------------
+
+    def _call_llm(self, suffix: str) -> LLMResponse:
+        """POST the prompt to Ollama's chat endpoint and parse the reply.
+
+        The static prefix goes in the system message and only the dynamic
+        tail in the user message, so Ollama's shared-prefix KV cache covers
+        the bulk of the prompt. With ``format=json`` Ollama returns clean
+        JSON in ``message.content`` — no ANSI codes or fences to strip.
+
+        Deterministic calls (temperature 0) are memoized on disk keyed by
+        SHA-256 of the exact prompt bytes, so re-runs over an unchanged
+        workspace skip inference entirely.
+        """
+        cacheable = self.temperature == 0
+        if cacheable:
+            key = hashlib.sha256(
+                "\x00".join((self.model, self._prefix, suffix)).encode()
+            ).hexdigest()
+            row = self._cache_db.execute(
+                "SELECT response FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                return decode_llm_response(row[0])
+
+        resp = self._session.post(
+            OLLAMA_CHAT_URL,
+            json={
+                "model": self.model,
+                "format": "json",
+                "stream": False,
+                "keep_alive": "30m",
+                "messages": [
+                    {"role": "system", "content": self._prefix},
+                    {"role": "user", "content": suffix},
+                ],
+                "options": {"num_ctx": self.num_ctx, "temperature": self.temperature},
+            },
+            timeout=120,
+        )
+        resp.raise_for_status()
+        llm_output = resp.json()["message"]["content"]
+        try:
+            # Parse and schema-validation fused into one pass.
+            parsed = decode_llm_response(llm_output)
+        except ValidationError:
+            llm_output = _CLEAN_RE.sub("", llm_output)
+            parsed = decode_llm_response(llm_output)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("LLM response:\n%s", llm_output)
+        if cacheable:
+            with self._cache_db:
+                self._cache_db.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, response, created_at) "
+                    "VALUES (?, ?, ?)",
+                    (key, llm_output, datetime.now(timezone.utc).timestamp()),
+                )
+        return parsed
+
+    # ------------------------------------------------------------------
+    # Reference resolution
+    # ------------------------------------------------------------------
+
+    def _resolve_references(self, args: dict, results: list[dict]) -> dict:
+        """Substitute ``{{actions[N]}}`` templates in args with prior results.
+
+        Most action args contain no template at all, so a single serialized
+        scan decides whether any work is needed; when it is, containers are
+        shallow-copied on the way down instead of deep-copying everything.
+        """
+        if not _has_template(args):
+            return args
+
+        invalid: set[int] = set()
+
+        def substitute(value: str) -> str:
+            # One regex pass rewrites every reference; each str.replace
+            # would rescan the whole string per match.
+            def repl(m: re.Match) -> str:
+                idx = int(m.group(1))
+                if 0 <= idx < len(results):
+                    return str(results[idx].get("result", ""))
+                invalid.add(idx)
+                return m.group(0)
+
+            return _ACTION_REF_RE.sub(repl, value)
+
+        root: dict = {"args": args}
+        stack: list[tuple] = [(root, "args", args)]
+        while stack:
+            parent, key, value = stack.pop()
+            if isinstance(value, str):
+                if "{{" in value:
+                    parent[key] = substitute(value)
+            elif isinstance(value, dict):
+                copied = dict(value)
+                parent[key] = copied
+                stack.extend((copied, k, v) for k, v in copied.items())
+            elif isinstance(value, list):
+                copied = list(value)
+                parent[key] = copied
+                stack.extend((copied, i, v) for i, v in enumerate(copied))
+        for idx in sorted(invalid):
+            logger.warning("Invalid action reference: %s", idx)
+        return root["args"]
+
+    # ------------------------------------------------------------------
+    # Action execution
+    # ------------------------------------------------------------------
+
+    def _run_single(self, action) -> dict:
+        try:
+            result = self.tool_registry.execute(action.tool, action.args)
+            return {"tool": action.tool, "status": "success", "result": result}
+        except PermissionError as e:
+            return {"tool": action.tool, "status": "security_error", "result": str(e)}
+        except Exception as e:
+            return {"tool": action.tool, "status": "error", "result": str(e)}
+
+    def _execute_actions(self, llm_response: LLMResponse) -> list[dict]:
+        actions = llm_response.actions
+        results: list[dict] = []
+
+        # Actions whose args carry no {{...}} reference don't depend on
+        # earlier results; the leading run of them can execute concurrently
+        # (tools are I/O-bound). Order is preserved so {{actions[N]}}
+        # indices in later actions stay correct.
+        independent = 0
+        for action in actions:
+            if action.tool == "finish" or _has_template(action.args):
+                break
+            independent += 1
+        # The pool only pays off for 2+ actions; a lone independent action
+        # (the most common response shape) falls through to the sequential
+        # loop, which must then start at 0 or the action is never run.
+        if independent > 1:
+            with ThreadPoolExecutor(max_workers=min(8, independent)) as pool:
+                results.extend(pool.map(self._run_single, actions[:independent]))
+            if any(r["status"] == "security_error" for r in results):
+                return results
+            start = independent
+        else:
+            start = 0
+
+        for action in actions[start:]:
+            if action.tool == "finish":
+                results.append(
+                    {
+                        "tool": "finish",
+                        "status": "success",
+                        "result": {"__FINISH__": True, **action.args},
+                    }
+                )
+                # Nothing after a finish should touch the filesystem.
+                break
+            try:
+                args = self._resolve_references(action.args, results)
+                result = self.tool_registry.execute(action.tool, args)
+                results.append({"tool": action.tool, "status": "success", "result": result})
+            except PermissionError as e:
+                results.append(
+                    {"tool": action.tool, "status": "security_error", "result": str(e)}
+                )
+                # Fail fast: don't keep executing a batch that tried to
+                # escape the workspace.
+                break
+            except Exception as e:
+                results.append({"tool": action.tool, "status": "error", "result": str(e)})
+        return results
+
+    # ------------------------------------------------------------------
+    # Termination
+    # ------------------------------------------------------------------
+
+    def _check_termination(self) -> Optional[str]:
+        if self.iteration >= self.max_iterations:
+            return "max_iterations"
+        if self._start_monotonic is not None:
+            if time.monotonic() - self._start_monotonic >= self.timeout_seconds:
+                return "timeout"
+        return None
+
+    # ------------------------------------------------------------------
+    # Main loop
+    # ------------------------------------------------------------------
+
+    def run_iteration(self) -> Optional[dict]:
+        """Run one iteration; return a finish payload if the agent finished."""
+        if self._start_monotonic is None:
+            self._start_monotonic = time.monotonic()
+            self.started_at = datetime.now(timezone.utc)
+        self.iteration += 1
+        suffix = self._dynamic_suffix()
+        reasoning = None
+        try:
+            llm_response = self._call_llm(suffix)
+            reasoning = llm_response.reasoning
+            results = self._execute_actions(llm_response)
+        except ValidationError as e:
+            results = [{"tool": None, "status": "error", "result": str(e)}]
+        entry = {"iteration": self.iteration, "reasoning": reasoning, "results": results}
+        self.action_history.append(entry)
+        if self._history_file is not None:
+            self._history_file.write(orjson.dumps(entry, default=str) + b"\n")
+        # _execute_actions stops at a finish, so only the last result can
+        # carry the finish payload — no need to scan the whole batch.
+        last = results[-1] if results else None
+        if (
+            last
+            and last.get("status") == "success"
+            and isinstance(last.get("result"), dict)
+            and last["result"].get("__FINISH__")
+        ):
+            return last["result"]
+        return None
+
+    def run(self) -> dict:
+        finish: Optional[dict] = None
+        reason = None
+        while True:
+            reason = self._check_termination()
+            if reason:
+                break
+            finish = self.run_iteration()
+            if finish:
+                reason = "finished"
+                break
+        summary = {
+            "status": "completed" if finish else "terminated",
+            "reason": reason,
+            "iterations": self.iteration,
+            "finish": finish,
+        }
+        if self._history_file is not None:
+            self._history_file.flush()
+            summary["history_path"] = self.history_path
+        else:
+            summary["history"] = list(self.action_history)
+        return summary
@@ -0,0 +1,169 @@
+"""Artifact collection strategies.
+
+After a job finishes, a strategy inspects the workspace (or the job's final
+output) and records what the job produced as rows in the artifacts table.
+"""
+
+import hashlib
+import logging
+import os
+import stat as _stat
+import subprocess
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+import orjson
+
+logger = logging.getLogger(__name__)
+
+_INSERT_ARTIFACT = (
+    "INSERT INTO artifacts (artifact_id, job_id, pipeline_id, name, artifact_type, "
+    "file_path, content, content_hash, size_bytes, metadata, created_at) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+
+def _timestamp() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _sha256_file(path) -> str:
+    """Stream-hash a file without pulling it through Python buffers.
+
+    file_digest feeds fixed-size chunks straight into the C hasher, which
+    uses OpenSSL's SHA-NI path on modern x86.
+    """
+    with open(path, "rb", buffering=0) as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+class ArtifactStrategy:
+    """Base class; subclasses collect artifacts for a completed job."""
+
+    def collect_artifacts(self, job: dict, db_conn) -> list[dict]:
+        raise NotImplementedError
+
+
+class StdoutFinalStrategy(ArtifactStrategy):
+    """Record the job's final output as a single inline artifact."""
+
+    def collect_artifacts(self, job: dict, db_conn) -> list[dict]:
+        final_output = job.get("final_output") or ""
+        artifact = {
+            "artifact_id": str(uuid.uuid4()),
+            "job_id": job["job_id"],
+            "pipeline_id": job.get("pipeline_id"),
+            "name": "stdout_final",
+            "artifact_type": "text",
+            "file_path": None,
+            "content": final_output,
+            "content_hash": hashlib.sha256(final_output.encode()).hexdigest(),
+            "size_bytes": len(final_output),
+            "metadata": orjson.dumps({"strategy": "stdout_final"}).decode(),
+            "created_at": _timestamp(),
+        }
+        if db_conn is not None:
+            with db_conn:
+                db_conn.executemany(_INSERT_ARTIFACT, [_to_row(artifact)])
+        return [artifact]
+
+
+class GitDiffStrategy(ArtifactStrategy):
+    """Record every file the job changed (modified or untracked) in git."""
+
+    def collect_artifacts(self, job: dict, db_conn) -> list[dict]:
+        job_dir = Path(job["workspace_path"])
+        artifacts: list[dict] = []
+        try:
+            created_at = _timestamp()
+
+            def handle_record(entry: bytes, skip_next: bool) -> bool:
+                if skip_next or len(entry) < 4:
+                    return False
+                status = entry[:2]
+                # Rename/copy entries are followed by the source path record.
+                follow = status.startswith(b"R") or status.startswith(b"C")
+                if b"D" in status:
+                    return follow
+                file_path = entry[3:].decode("utf-8", "replace")
+                full_path = os.fspath(job_dir / file_path)
+                # One os.stat answers existence, type, and size together.
+                try:
+                    st = os.stat(full_path)
+                except FileNotFoundError:
+                    return follow
+                size_bytes = st.st_size if _stat.S_ISREG(st.st_mode) else 0
+                artifacts.append(
+                    {
+                        "artifact_id": str(uuid.uuid4()),
+                        "job_id": job["job_id"],
+                        "pipeline_id": job.get("pipeline_id"),
+                        "name": file_path,
+                        "artifact_type": "file",
+                        "file_path": full_path,
+                        "content": None,
+                        "content_hash": _sha256_file(full_path) if size_bytes else None,
+                        "size_bytes": size_bytes,
+                        "metadata": orjson.dumps({"strategy": "git_diff"}).decode(),
+                        "created_at": created_at,
+                    }
+                )
+                return follow
+
+            # One git invocation covers both modified and untracked files;
+            # -z gives a NUL-delimited stream that needs no newline quoting.
+            # Streaming the pipe keeps peak memory at one record instead of
+            # the whole status output, and overlaps parsing with git.
+            with subprocess.Popen(
+                ["git", "status", "--porcelain=v1", "-z", "--untracked-files=all"],
+                cwd=job_dir,
+                stdout=subprocess.PIPE,
+            ) as proc:
+                buf = b""
+                skip_next = False
+                for chunk in iter(lambda: proc.stdout.read(65536), b""):
+                    buf += chunk
+                    *records, buf = buf.split(b"\x00")
+                    for entry in records:
+                        skip_next = handle_record(entry, skip_next)
+                if buf:
+                    handle_record(buf, skip_next)
+
+            if db_conn is not None and artifacts:
+                # One parsed statement + one transaction for the whole batch
+                # instead of a round-trip per changed file.
+                rows = [_to_row(a) for a in artifacts]
+                with db_conn:
+                    db_conn.executemany(_INSERT_ARTIFACT, rows)
+        except Exception:
+            logger.exception(
+                "git_diff artifact collection failed after %d artifacts", len(artifacts)
+            )
+            # A single bad path shouldn't throw away the rest of the batch:
+            # persist whatever was collected before the failure.
+            if db_conn is not None and artifacts:
+                try:
+                    with db_conn:
+                        db_conn.executemany(
+                            _INSERT_ARTIFACT, [_to_row(a) for a in artifacts]
+                        )
+                except Exception:
+                    logger.exception("failed to persist partial artifact batch")
+        return artifacts
+
+
+def _to_row(artifact: dict) -> tuple:
+    return (
+        artifact["artifact_id"],
+        artifact["job_id"],
+        artifact["pipeline_id"],
+        artifact["name"],
+        artifact["artifact_type"],
+        artifact["file_path"],
+        artifact["content"],
+        artifact["content_hash"],
+        artifact["size_bytes"],
+        artifact["metadata"],
+        artifact["created_at"],
+    )
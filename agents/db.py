@@ -0,0 +1,392 @@
+"""ClowderDB: SQLite persistence for tasks, jobs, and action history."""
+
+import contextlib
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Iterator, Optional, Sequence
+
+import orjson
+
+try:  # Optional: large action payloads are stored zstd-compressed.
+    import zstandard as _zstd
+
+    _zcompress = _zstd.ZstdCompressor(level=1).compress
+    _zdecompress = _zstd.ZstdDecompressor().decompress
+except ImportError:  # pragma: no cover - payloads fall back to plain text
+    _zcompress = None
+    _zdecompress = None
+
+# Standard zstd frame magic; reads detect compressed values by prefix, so
+# old uncompressed rows and new compressed ones coexist in one table.
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+# Below this size the frame overhead eats the win; store plain text.
+_COMPRESS_MIN_BYTES = 1024
+
+
+def _pack_payload(data: bytes):
+    """Compress a serialized payload when it is large enough to pay off.
+
+    WAL I/O scales with byte volume, and verbose LLM responses compress
+    5-10x at zstd level 1, so shrinking the column shrinks every flush.
+    """
+    if _zcompress is not None and len(data) >= _COMPRESS_MIN_BYTES:
+        return sqlite3.Binary(_zcompress(data))
+    return data.decode()
+
+
+def _unpack_payload(value):
+    """Undo _pack_payload; passes plain-text values straight through."""
+    if isinstance(value, bytes) and value[:4] == _ZSTD_MAGIC and _zdecompress is not None:
+        return _zdecompress(value)
+    return value
+
+
+# Hot-path SQL lives in module-level constants: identical string objects on
+# every call keep sqlite3's internal statement cache hitting, so the SQL is
+# parsed once per connection rather than per call.
+SQL_INSERT_ACTION = (
+    "INSERT INTO actions (job_id, iteration, llm_response, results, "
+    "raw_stdout, raw_stderr, timestamp) VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+SQL_UPDATE_STATE = (
+    "UPDATE agent_state SET status = ?, iteration = ?, "
+    "started_at = COALESCE(?, started_at), "
+    "started_at_epoch = COALESCE(?, started_at_epoch), "
+    "updated_at = ? WHERE task_id = ?"
+)
+SQL_UPDATE_JOB_ITER = "UPDATE jobs SET iteration = ?, updated_at = ? WHERE job_id = ?"
+
+# Read once at import: short-lived CLI invocations shouldn't pay a file
+# open + decode per ClowderDB construction.
+_SCHEMA = (Path(__file__).parent / "schema.sql").read_bytes()
+
+
+# slots=True drops the per-instance __dict__ (about half the memory, and
+# attribute reads hit the slot descriptor directly); frozen=True makes both
+# hashable so they can key harness-side caches.
+@dataclass(slots=True, frozen=True)
+class Task:
+    task_id: str
+    prompt: str
+    model: str
+    timeout_seconds: int
+    created_at: str
+
+
+@dataclass(slots=True, frozen=True)
+class AgentState:
+    task_id: str
+    status: str
+    iteration: int
+    started_at: Optional[str]
+    started_at_epoch: Optional[float]
+    updated_at: Optional[str]
+
+
+class ClowderDB:
+    """Thin wrapper around the Clowder SQLite database."""
+
+    # Instances parked by acquire(), keyed by path. Re-acquiring hands
+    # back the same instance with its connections, PRAGMAs, and schema
+    # check already paid, instead of a cold open per phase.
+    _pools: dict[str, queue.SimpleQueue] = {}
+    _pools_lock = threading.Lock()
+
+    @classmethod
+    @contextlib.contextmanager
+    def acquire(cls, db_path: str = "clowder.db") -> Iterator["ClowderDB"]:
+        """Check a pooled instance out for the duration of a with-block."""
+        with cls._pools_lock:
+            pool = cls._pools.setdefault(db_path, queue.SimpleQueue())
+        try:
+            db = pool.get_nowait()
+        except queue.Empty:
+            db = cls(db_path)
+        try:
+            yield db
+        finally:
+            pool.put(db)
+
+    def __init__(self, db_path: str = "clowder.db", enforce_foreign_keys: bool = False) -> None:
+        self.db_path = db_path
+        # FK enforcement walks parent-table indices on every INSERT; for the
+        # append-heavy action log the invariants are upheld by the
+        # application, so the long-running harness connection skips it.
+        self.enforce_foreign_keys = enforce_foreign_keys
+        # Multi-reader / single-writer: each thread gets its own WAL
+        # connection (readers never block each other), while a process-wide
+        # lock serializes writes instead of funnelling everything through
+        # one shared connection.
+        self._tls = threading.local()
+        self._write_lock = threading.Lock()
+        self.init_schema()
+
+    def _open_conn(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.db_path, check_same_thread=False, cached_statements=256
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode = WAL")
+        if self.enforce_foreign_keys:
+            conn.execute("PRAGMA foreign_keys = ON")
+        # WAL makes synchronous=NORMAL safe (no torn pages on app crash)
+        # and drops the per-transaction fsync; the rest keep hot pages and
+        # temp structures in memory.
+        conn.executescript(
+            "PRAGMA synchronous = NORMAL;"
+            "PRAGMA cache_size = -64000;"
+            "PRAGMA temp_store = MEMORY;"
+            "PRAGMA mmap_size = 268435456;"
+            "PRAGMA wal_autocheckpoint = 1000;"
+        )
+        return conn
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        conn = getattr(self._tls, "conn", None)
+        if conn is None:
+            conn = self._open_conn()
+            self._tls.conn = conn
+        return conn
+
+    def init_schema(self) -> None:
+        self.conn.executescript(_SCHEMA.decode())
+        self.conn.commit()
+
+    def close(self) -> None:
+        conn = getattr(self._tls, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._tls.conn = None
+
+    @staticmethod
+    def _timestamp() -> str:
+        return datetime.now(timezone.utc).isoformat()
+
+    # ------------------------------------------------------------------
+    # Tasks
+    # ------------------------------------------------------------------
+
+    def create_task(
+        self, prompt: str, model: str = "qwen2.5-coder:7b", timeout_seconds: int = 600
+    ) -> tuple[Task, AgentState]:
+        """Create a task and its initial state row in one transaction.
+
+        ``with self.conn`` gives both INSERTs a single BEGIN/COMMIT (one
+        fsync), and RETURNING on the state INSERT hands back the created
+        row without a follow-up SELECT.
+        """
+        task_id = str(uuid.uuid4())
+        created_at = self._timestamp()
+        with self._write_lock, self.conn:
+            # When FKs are on, validate once at commit instead of per row.
+            self.conn.execute("PRAGMA defer_foreign_keys = ON")
+            self.conn.execute(
+                "INSERT INTO tasks (task_id, prompt, model, timeout_seconds, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (task_id, prompt, model, timeout_seconds, created_at),
+            )
+            row = self.conn.execute(
+                "INSERT INTO agent_state (task_id, status, iteration, started_at, updated_at) "
+                "VALUES (?, 'pending', 0, NULL, ?) "
+                "RETURNING task_id, status, iteration, started_at, started_at_epoch, "
+                "updated_at",
+                (task_id, created_at),
+            ).fetchone()
+        task = Task(task_id, prompt, model, timeout_seconds, created_at)
+        return task, AgentState(*row)
+
+    def get_task(self, task_id: str) -> Optional[Task]:
+        row = self.conn.execute(
+            "SELECT * FROM tasks WHERE task_id = ?", (task_id,)
+        ).fetchone()
+        return Task(**dict(row)) if row else None
+
+    def get_state(self, task_id: str) -> Optional[AgentState]:
+        row = self.conn.execute(
+            "SELECT * FROM agent_state WHERE task_id = ?", (task_id,)
+        ).fetchone()
+        return AgentState(**dict(row)) if row else None
+
+    def update_state(
+        self, task_id: str, status: str, iteration: int, started_at: Optional[str] = None
+    ) -> None:
+        started_at_epoch = time.time() if started_at is not None else None
+        with self._write_lock:
+            self.conn.execute(
+                SQL_UPDATE_STATE,
+                (status, iteration, started_at, started_at_epoch, self._timestamp(), task_id),
+            )
+            self.conn.commit()
+
+    def check_termination(self, task_id: str) -> Optional[str]:
+        """Return a termination reason for the task, or None to keep going."""
+        task = self.get_task(task_id)
+        state = self.get_state(task_id)
+        if task is None or state is None:
+            return "missing"
+        if state.status in ("stopped", "cancelled"):
+            return state.status
+        if state.started_at_epoch:
+            if time.time() - state.started_at_epoch >= task.timeout_seconds:
+                return "timeout"
+        return None
+
+    # ------------------------------------------------------------------
+    # Action logging
+    # ------------------------------------------------------------------
+
+    def log_action(
+        self,
+        job_id: str,
+        iteration: int,
+        llm_response: Any,
+        results: Any,
+        raw_stdout: str = "",
+        raw_stderr: str = "",
+        commit: bool = True,
+    ) -> None:
+        """Insert one action row.
+
+        Pass commit=False when the caller composes this into a larger
+        transaction (e.g. alongside the per-iteration jobs update).
+        """
+        # llm_response and raw_stdout compress when large; results and
+        # raw_stderr stay text because failed_actions_summary filters and
+        # previews them with SQL string functions.
+        row = (
+            job_id,
+            iteration,
+            _pack_payload(orjson.dumps(llm_response, default=str)),
+            orjson.dumps(results, default=str).decode(),
+            _pack_payload(raw_stdout.encode()) if raw_stdout else raw_stdout,
+            raw_stderr,
+            self._timestamp(),
+        )
+        if commit:
+            with self._write_lock:
+                self.conn.execute(SQL_INSERT_ACTION, row)
+                self.conn.commit()
+        else:
+            # Caller owns the transaction (and its locking).
+            self.conn.execute(SQL_INSERT_ACTION, row)
+
+    def log_actions_bulk(self, rows: list[tuple], commit: bool = True) -> None:
+        """Insert many pre-serialized action rows in one transaction.
+
+        Each row is (job_id, iteration, llm_response_json, results_json,
+        raw_stdout, raw_stderr, timestamp). One BEGIN/COMMIT covers the
+        whole batch, so the per-commit fsync cost is amortized over the
+        buffer instead of paid per iteration.
+        """
+        if not rows:
+            return
+        if commit:
+            with self._write_lock, self.conn:
+                self.conn.execute("PRAGMA defer_foreign_keys = ON")
+                self.conn.executemany(SQL_INSERT_ACTION, rows)
+        else:
+            self.conn.executemany(SQL_INSERT_ACTION, rows)
+
+    def get_actions(self, job_id: str, limit: int = 50) -> list[sqlite3.Row]:
+        """Return action rows as sqlite3.Row objects.
+
+        Row already supports ``row["col"]``, so consumers don't need (and
+        no longer pay for) a dict allocation per row; callers that must
+        serialize can run the result through to_dict_list.
+        """
+        return self.conn.execute(
+            "SELECT * FROM actions WHERE job_id = ? ORDER BY iteration ASC LIMIT ?",
+            (job_id, int(limit)),
+        ).fetchall()
+
+    def get_action_history(
+        self, job_id: str, limit: int = 3, columns: Optional[Sequence[str]] = None
+    ) -> Iterator[dict]:
+        """Yield recent action rows, newest first.
+
+        Rows stream off the cursor instead of materializing a fetchall
+        list, and the JSON columns are only decoded when requested via
+        *columns* (default: all three), so callers that need just the
+        iteration numbers skip deserializing kilobytes of llm_response.
+        """
+        if columns is None:
+            columns = ("iteration", "llm_response", "results")
+        cursor = self.conn.execute(
+            "SELECT iteration, llm_response, results FROM actions "
+            "WHERE job_id = ? ORDER BY iteration DESC LIMIT ?",
+            (job_id, limit),
+        )
+        for row in cursor:
+            entry: dict = {}
+            for col in columns:
+                value = row[col]
+                if col in ("llm_response", "results") and value is not None:
+                    value = orjson.loads(_unpack_payload(value))
+                entry[col] = value
+            yield entry
+
+    def get_failed_actions(self, job_id: str) -> list[sqlite3.Row]:
+        return self.conn.execute(
+            "SELECT * FROM failed_actions_summary WHERE job_id = ? ORDER BY iteration ASC",
+            (job_id,),
+        ).fetchall()
+
+
+class ReadPool:
+    """Pool of read-only connections for monitor/query threads.
+
+    Connections open with ``mode=ro`` via the URI form, so SQLite rejects
+    stray writes and skips the write-path locking entirely; under WAL the
+    readers run in parallel with the single writer without ever blocking
+    it. Checkout blocks when all connections are out, which naturally caps
+    read concurrency at the pool size (default: one per CPU).
+    """
+
+    def __init__(self, db_path: str, size: Optional[int] = None) -> None:
+        self.db_path = db_path
+        size = size or os.cpu_count() or 4
+        self._pool: queue.Queue[sqlite3.Connection] = queue.Queue(maxsize=size)
+        for _ in range(size):
+            conn = sqlite3.connect(
+                f"file:{db_path}?mode=ro",
+                uri=True,
+                check_same_thread=False,
+                cached_statements=256,
+            )
+            conn.row_factory = sqlite3.Row
+            conn.executescript(
+                "PRAGMA busy_timeout = 5000;"
+                "PRAGMA cache_size = -20000;"
+            )
+            self._pool.put(conn)
+
+    @contextlib.contextmanager
+    def read(self) -> Iterator[sqlite3.Connection]:
+        conn = self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+def to_dict_list(rows: Sequence[sqlite3.Row]) -> list[dict]:
+    """Convert sqlite3.Row results to dicts for callers that serialize them."""
+    if not rows:
+        return []
+    cols = rows[0].keys()
+    return [dict(zip(cols, row)) for row in rows]
@@ -0,0 +1,198 @@
+"""CLI harness: runs a single job's agent loop against the Clowder DB."""
+
+import argparse
+import threading
+import uuid
+from pathlib import Path
+from typing import Optional
+
+import orjson
+
+from .agent import Agent
+from .db import SQL_UPDATE_JOB_ITER, ClowderDB, _pack_payload
+from .tools import ToolRegistry
+
+_SQL_JOB_STATUS = "SELECT status FROM jobs WHERE job_id = ?"
+
+
+class AgentHarness:
+    """Drives one job's Agent loop, persisting progress to the DB."""
+
+    # Action rows are buffered and flushed in batches so the actions table
+    # sees one transaction per FLUSH_EVERY iterations, not one per row.
+    FLUSH_EVERY = 8
+
+    def __init__(self, db: ClowderDB, job_id: str) -> None:
+        self.db = db
+        self.job_id = job_id
+        self._action_buffer: list[tuple] = []
+        self._stop_event = threading.Event()
+        self._data_version: Optional[int] = None
+
+    def request_stop(self) -> None:
+        """Ask the running loop to stop before its next iteration."""
+        self._stop_event.set()
+
+    def _load_job(self, job_id: str):
+        return self.db.conn.execute(
+            "SELECT * FROM jobs WHERE job_id = ?", (job_id,)
+        ).fetchone()
+
+    def _check_external_stop(self) -> Optional[str]:
+        """Cheap per-iteration stop check.
+
+        The in-process event costs nothing. For out-of-process stop
+        signals, PRAGMA data_version acts as a change notification: it
+        only moves when *another* connection has written to the database
+        (our own per-iteration writes don't bump it), so the narrow
+        status SELECT runs only after someone else actually changed
+        something — a zero-table-I/O fast path in the common no-stop case.
+        """
+        if self._stop_event.is_set():
+            return "stopped"
+        version = self.db.conn.execute("PRAGMA data_version").fetchone()[0]
+        if version == self._data_version:
+            return None
+        self._data_version = version
+        row = self.db.conn.execute(_SQL_JOB_STATUS, (self.job_id,)).fetchone()
+        if row and row["status"] in ("stopped", "cancelled"):
+            return row["status"]
+        return None
+
+    def _flush_actions(self, commit: bool = True) -> None:
+        self.db.log_actions_bulk(self._action_buffer, commit=commit)
+        self._action_buffer.clear()
+
+    def run(self) -> dict:
+        job = self._load_job(self.job_id)
+        if job is None:
+            raise ValueError(f"Unknown job: {self.job_id}")
+
+        allowed_paths = orjson.loads(job["allowed_paths"]) if job["allowed_paths"] else ["."]
+        agent = Agent(
+            task=job["prompt"] or "",
+            tool_registry=ToolRegistry(allowed_paths),
+        )
+
+        ts = self.db._timestamp()
+        self.db.conn.execute(
+            "UPDATE jobs SET status = 'running', started_at = ?, updated_at = ? "
+            "WHERE job_id = ?",
+            (ts, ts, self.job_id),
+        )
+        self.db.conn.commit()
+
+        finish = None
+        reason = None
+        while True:
+            reason = self._check_external_stop()
+            if reason:
+                break
+            reason = agent._check_termination()
+            if reason:
+                break
+
+            finish = agent.run_iteration()
+            entry = agent.action_history[-1]
+
+            # One timestamp per iteration transaction; the clock read and
+            # ISO formatting aren't worth repeating per statement.
+            ts = self.db._timestamp()
+            self._action_buffer.append(
+                (
+                    self.job_id,
+                    agent.iteration,
+                    _pack_payload(orjson.dumps(entry.get("reasoning"))),
+                    orjson.dumps(entry["results"], default=str).decode(),
+                    "",
+                    "",
+                    ts,
+                )
+            )
+            # One transaction (one WAL commit) covers the jobs update and
+            # any due action flush for this iteration.
+            with self.db.conn:
+                self.db.conn.execute(
+                    SQL_UPDATE_JOB_ITER,
+                    (agent.iteration, ts, self.job_id),
+                )
+                if len(self._action_buffer) >= self.FLUSH_EVERY:
+                    self._flush_actions(commit=False)
+
+            if finish:
+                reason = "finished"
+                break
+
+        self._flush_actions()
+        status = "completed" if finish else "failed"
+        ts = self.db._timestamp()
+        self.db.conn.execute(
+            "UPDATE jobs SET status = ?, final_output = ?, completed_at = ?, "
+            "updated_at = ? WHERE job_id = ?",
+            (status, orjson.dumps(finish).decode() if finish else None, ts, ts, self.job_id),
+        )
+        self.db.conn.commit()
+        return {"status": status, "reason": reason, "iterations": agent.iteration}
+
+
+def _create_job_from_prompt(db: ClowderDB, prompt: str, workspace_path: Path) -> str:
+    """Create a standalone pipeline/stage/job triple for an ad-hoc prompt."""
+    pipeline_id = str(uuid.uuid4())
+    stage_id = str(uuid.uuid4())
+    job_id = str(uuid.uuid4())
+    timestamp = db._timestamp()
+    workspace_str = str(workspace_path)
+    allowed_paths_json = orjson.dumps([workspace_str]).decode()
+    # One BEGIN/COMMIT (one WAL fsync) covers all three INSERTs.
+    with db.conn:
+        db.conn.execute(
+            "INSERT INTO pipelines (pipeline_id, original_prompt, status, created_at) "
+            "VALUES (?, ?, 'running', ?)",
+            (pipeline_id, prompt, timestamp),
+        )
+        db.conn.execute(
+            "INSERT INTO stages (stage_id, pipeline_id, name, stage_order, status, created_at) "
+            "VALUES (?, ?, 'adhoc', 0, 'running', ?)",
+            (stage_id, pipeline_id, timestamp),
+        )
+        db.conn.execute(
+            "INSERT INTO jobs (job_id, pipeline_id, stage_id, agent_type, prompt, status, "
+            "allowed_paths, workspace_path, created_at) "
+            "VALUES (?, ?, ?, 'full', ?, 'pending', ?, ?, ?)",
+            (
+                job_id,
+                pipeline_id,
+                stage_id,
+                prompt,
+                allowed_paths_json,
+                workspace_str,
+                timestamp,
+            ),
+        )
+    return job_id
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run a Clowder job")
+    parser.add_argument("job_id", nargs="?", help="Existing job to run")
+    parser.add_argument("--prompt", help="Create and run an ad-hoc job")
+    parser.add_argument("--workspace", default=".", help="Workspace for ad-hoc jobs")
+    parser.add_argument("--db", default="clowder.db")
+    args = parser.parse_args(argv)
+
+    db = ClowderDB(args.db)
+    try:
+        job_id = args.job_id
+        if job_id is None:
+            if not args.prompt:
+                parser.error("either job_id or --prompt is required")
+            job_id = _create_job_from_prompt(db, args.prompt, Path(args.workspace))
+        result = AgentHarness(db, job_id).run()
+        print(orjson.dumps(result).decode())
+        return 0 if result["status"] == "completed" else 1
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,93 @@
+"""Long-lived harness daemon: one warm ClowderDB shared across jobs.
+
+Each ``python -m agents.harness <job>`` invocation opens a fresh SQLite
+connection, replays the PRAGMA setup, and starts with a cold page cache.
+For scripted pipelines that run many jobs back to back, this daemon keeps a
+single ClowderDB alive behind a Unix socket, so repeat jobs reuse the same
+connection and hit sqlite's in-memory page cache for hot rows (jobs, recent
+actions) instead of disk.
+
+Protocol: one JSON object per connection. ``{"job_id": "..."}`` runs an
+existing job; ``{"prompt": "...", "workspace": "..."}`` creates and runs an
+ad-hoc one. The reply is the harness result dict as a single JSON object.
+"""
+
+import argparse
+import os
+import socket
+import socketserver
+from pathlib import Path
+from typing import Optional
+
+import orjson
+
+from .db import ClowderDB
+from .harness import AgentHarness, _create_job_from_prompt
+
+
+class _JobRequestHandler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        raw = self.rfile.readline()
+        if not raw:
+            return
+        db: ClowderDB = self.server.db  # type: ignore[attr-defined]
+        try:
+            request = orjson.loads(raw)
+            job_id = request.get("job_id")
+            if job_id is None:
+                job_id = _create_job_from_prompt(
+                    db, request["prompt"], Path(request.get("workspace", "."))
+                )
+            result = AgentHarness(db, job_id).run()
+        except Exception as exc:
+            result = {"status": "failed", "reason": f"server error: {exc}"}
+        self.wfile.write(orjson.dumps(result) + b"\n")
+
+
+class HarnessServer(socketserver.ThreadingUnixStreamServer):
+    """Unix-socket server that runs jobs against one shared ClowderDB."""
+
+    daemon_threads = True
+
+    def __init__(self, db: ClowderDB, socket_path: str) -> None:
+        self.db = db
+        # A stale socket file from a previous run blocks bind().
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        super().__init__(socket_path, _JobRequestHandler)
+
+
+def submit(request: dict, socket_path: str = "clowder.sock") -> dict:
+    """Thin client: send one job request to a running daemon."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(socket_path)
+        sock.sendall(orjson.dumps(request) + b"\n")
+        reply = b""
+        while not reply.endswith(b"\n"):
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            reply += chunk
+    return orjson.loads(reply)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run the Clowder harness daemon")
+    parser.add_argument("--db", default="clowder.db")
+    parser.add_argument("--socket", default="clowder.sock")
+    args = parser.parse_args(argv)
+
+    db = ClowderDB(args.db)
+    server = HarnessServer(db, args.socket)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,73 @@
+"""Mock agent for exercising pipelines without an LLM.
+
+Stands in for a real agent in test pipelines: optionally sleeps to simulate
+work, runs an inline Python snippet and/or a shell command, and prints a
+canned final output.
+"""
+
+import argparse
+import shlex
+import subprocess
+import time
+from functools import lru_cache
+from typing import Optional
+
+
+@lru_cache(maxsize=128)
+def _compile_inline(source: str):
+    """Compile an inline snippet once per distinct source string.
+
+    Test pipelines spawn many mock jobs sharing the same --python snippet;
+    caching the code object skips the tokenizer/parser/compiler on every
+    run after the first.
+    """
+    return compile(source, "<inline>", "exec")
+
+
+_SHELL_CHARS = frozenset("|&;<>$`()*?[]{}~\"'\\\n")
+
+
+def run_command(command: str) -> int:
+    """Run a command, spawning a shell only when it's actually needed.
+
+    shell=True forks a shell just to parse the command line; for the
+    plain commands short mock jobs run, that doubles process-creation
+    cost. Commands without shell metacharacters go straight to exec via
+    shlex.split.
+    """
+    needs_shell = not _SHELL_CHARS.isdisjoint(command)
+    cmd = command if needs_shell else shlex.split(command)
+    return subprocess.run(cmd, shell=needs_shell).returncode
+
+
+def run_inline_python(source: str, namespace: Optional[dict] = None) -> dict:
+    """Execute an inline snippet against *namespace* and return it."""
+    if namespace is None:
+        namespace = {}
+    exec(_compile_inline(source), namespace)
+    return namespace
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run a mock Clowder agent")
+    parser.add_argument("--duration", type=float, default=0.0, help="Simulated work time")
+    parser.add_argument("--python", help="Inline Python snippet to execute")
+    parser.add_argument("--command", help="Shell command to run")
+    parser.add_argument("--output", help="Final output to print")
+    parser.add_argument("--fail", action="store_true", help="Exit non-zero")
+    args = parser.parse_args(argv)
+
+    if args.duration:
+        time.sleep(args.duration)
+    if args.python:
+        run_inline_python(args.python)
+    returncode = 0
+    if args.command:
+        returncode = run_command(args.command)
+    if args.output:
+        print(args.output)
+    return 1 if args.fail else returncode
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,554 @@
+"""Orchestrator: advances pipelines by spawning jobs whose dependencies are met.
+
+The orchestrator polls the Clowder DB for pending/running pipelines, launches
+ready jobs as subprocesses, and handles job multipliers — template jobs that
+fan out into one spawned job per item of a completed job's output (e.g. a
+planner emitting a task list).
+"""
+
+import argparse
+import io
+import logging
+import re
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator, Optional
+
+import orjson
+
+try:  # Optional: large JSON-array artifacts parse incrementally.
+    import ijson
+except ImportError:  # pragma: no cover - falls back to whole-blob parsing
+    ijson = None
+
+import sqlite3
+
+from .db import ClowderDB
+
+logger = logging.getLogger(__name__)
+
+_INSERT_JOB = (
+    "INSERT INTO jobs (job_id, pipeline_id, stage_id, parent_job_id, "
+    "template_job_id, agent_type, prompt, command, status, allowed_paths, "
+    "workspace_path, artifact_strategy, created_at) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, 'pending', ?, ?, ?, ?)"
+)
+_INSERT_DEP = (
+    "INSERT INTO job_dependencies (job_id, depends_on_job_id, dependency_type) "
+    "VALUES (?, ?, 'success')"
+)
+# Bulk variants for very large batches: the per-item fields travel as one
+# JSON blob that SQLite explodes server-side with json_each, so the batch
+# crosses the Python/SQLite boundary as a handful of binds instead of
+# thousands of row tuples.
+_INSERT_JOBS_FROM_JSON = (
+    "INSERT INTO jobs (job_id, pipeline_id, stage_id, parent_job_id, "
+    "template_job_id, agent_type, prompt, command, status, allowed_paths, "
+    "workspace_path, artifact_strategy, created_at) "
+    "SELECT json_extract(value, '$.j'), ?, ?, ?, ?, ?, "
+    "json_extract(value, '$.p'), json_extract(value, '$.c'), 'pending', "
+    "?, ?, ?, ? FROM json_each(?)"
+)
+_INSERT_DEPS_FROM_JSON = (
+    "INSERT INTO job_dependencies (job_id, depends_on_job_id, dependency_type) "
+    "SELECT json_extract(value, '$.j'), ?, 'success' FROM json_each(?)"
+)
+# Below this row count per-row tuple binds beat the JSON detour.
+_BULK_SPAWN_MIN_ROWS = 500
+# One JOIN resolves everything a job completion needs to know about
+# multiplier candidates: the pipeline's template, each multiplier template
+# job, its concrete stage, and — via the anti-join on existing jobs —
+# whether this completion already spawned it. The source-job filter runs
+# inside SQLite with json_extract, so no candidate rows cross into Python
+# just to be discarded.
+_SQL_MULTIPLIER_CANDIDATES = (
+    "SELECT tj.*, ts.stage_order, s.stage_id FROM jobs j "
+    "JOIN pipelines p ON p.pipeline_id = j.pipeline_id "
+    "JOIN template_stages ts ON ts.template_id = p.template_id "
+    "JOIN template_jobs tj ON tj.template_stage_id = ts.template_stage_id "
+    "JOIN stages s ON s.pipeline_id = j.pipeline_id AND s.stage_order = ts.stage_order "
+    "LEFT JOIN jobs existing ON existing.parent_job_id = j.job_id "
+    "AND existing.template_job_id = tj.template_job_id "
+    "WHERE j.job_id = ? AND tj.job_multiplier IS NOT NULL "
+    "AND json_extract(tj.job_multiplier, '$.source_template_job_id') = j.template_job_id "
+    "AND existing.job_id IS NULL"
+)
+# Per-cycle statements as module constants: the identical string objects on
+# every call keep sqlite3's statement-cache lookups hitting, so none of the
+# hot-loop SQL is re-parsed over the hours an orchestrator runs.
+_SQL_FIND_PENDING = "SELECT pipeline_id FROM pipelines WHERE status = 'pending'"
+_SQL_FIND_RUNNING = "SELECT pipeline_id FROM pipelines WHERE status = 'running'"
+_SQL_MARK_PIPELINE_RUNNING = (
+    "UPDATE pipelines SET status = 'running', updated_at = ? WHERE pipeline_id = ?"
+)
+# Dependency readiness as one aggregation instead of a correlated NOT
+# EXISTS re-evaluated per candidate: each dependency edge is visited once
+# and counted as satisfied or not, so cost is O(jobs + deps) rather than
+# re-scanning dependencies for every pending job in fan-out/fan-in graphs.
+_SQL_FIND_READY_JOBS = (
+    "SELECT j.* FROM jobs j "
+    "LEFT JOIN job_dependencies jd ON jd.job_id = j.job_id "
+    "LEFT JOIN jobs dep ON dep.job_id = jd.depends_on_job_id "
+    "WHERE j.pipeline_id = ? AND j.status = 'pending' "
+    "GROUP BY j.job_id "
+    "HAVING SUM(CASE "
+    "  WHEN jd.job_id IS NULL THEN 0 "
+    "  WHEN jd.dependency_type = 'success' AND dep.status = 'completed' THEN 0 "
+    "  WHEN jd.dependency_type = 'failure' AND dep.status = 'failed' THEN 0 "
+    "  WHEN jd.dependency_type = 'always' "
+    "    AND dep.status IN ('completed', 'failed') THEN 0 "
+    "  ELSE 1 END) = 0"
+)
+_SQL_MARK_JOB_RUNNING = (
+    "UPDATE jobs SET status = 'running', started_at = ?, updated_at = ? "
+    "WHERE job_id = ?"
+)
+_SQL_MARK_JOB_TERMINAL = (
+    "UPDATE jobs SET status = ?, completed_at = ?, updated_at = ? "
+    "WHERE job_id = ? AND status = 'running'"
+)
+_SQL_DRAIN_EVENTS = "DELETE FROM events RETURNING type"
+_SQL_COMPLETE_PIPELINE = (
+    "UPDATE pipelines SET "
+    "status = (SELECT CASE WHEN SUM(status = 'failed') > 0 THEN 'failed' "
+    "ELSE 'completed' END FROM jobs WHERE pipeline_id = pipelines.pipeline_id), "
+    "completed_at = ?, updated_at = ? "
+    "WHERE pipeline_id = ? AND status = 'running' "
+    "AND EXISTS (SELECT 1 FROM jobs WHERE pipeline_id = pipelines.pipeline_id) "
+    "AND NOT EXISTS (SELECT 1 FROM jobs "
+    "WHERE pipeline_id = pipelines.pipeline_id "
+    "AND status NOT IN ('completed', 'failed'))"
+)
+_SQL_COMPLETE_STAGES = (
+    "UPDATE stages SET status = (SELECT status FROM pipelines "
+    "WHERE pipeline_id = ?), updated_at = ? WHERE pipeline_id = ?"
+)
+
+
+_COMMA_SPLIT_RE = re.compile(r"\s*,\s*")
+_PLACEHOLDER_RE = re.compile(r"\{\{(\w+)\}\}")
+
+
+def _render_template(template: str, values: dict) -> str:
+    """Resolve {{name}} placeholders in one pass over the template.
+
+    Unknown names pass through untouched, so substitution can be staged:
+    batch-invariant values first, per-item values later.
+    """
+    return _PLACEHOLDER_RE.sub(lambda m: values.get(m.group(1), m.group(0)), template)
+# Below this size a whole-blob parse is cheaper than streaming setup.
+_STREAM_PARSE_MIN_BYTES = 64_000
+
+
+def parse_artifact_content(
+    content: str, parse_strategy: str = "line_delimited"
+) -> Iterator[str]:
+    """Yield multiplier items from a source artifact's content.
+
+    A generator, so the spawn loop consumes items as they are produced
+    instead of holding the parsed list alongside the raw content. The
+    line and comma strategies stay in C: splitlines / a precompiled
+    re.split plus filter(None, map(str.strip, ...)) instead of a Python
+    loop with per-line strip-and-test. Large JSON arrays stream through
+    ijson (when installed) one element at a time, keeping peak memory at
+    one item rather than the whole decoded list.
+    """
+    if parse_strategy == "json_array":
+        # Cheap prefix check skips the try/except for the common case of a
+        # plain single-item artifact that isn't JSON at all.
+        if content.lstrip()[:1] != "[":
+            stripped = content.strip()
+            if stripped:
+                yield stripped
+            return
+        if ijson is not None and len(content) > _STREAM_PARSE_MIN_BYTES:
+            for item in ijson.items(io.StringIO(content), "item"):
+                yield item if isinstance(item, str) else str(item)
+            return
+        try:
+            data = orjson.loads(content)
+        except orjson.JSONDecodeError:
+            stripped = content.strip()
+            if stripped:
+                yield stripped
+            return
+        for item in data:
+            yield item if isinstance(item, str) else orjson.dumps(item).decode()
+        return
+    if parse_strategy == "comma_separated":
+        yield from filter(None, map(str.strip, _COMMA_SPLIT_RE.split(content)))
+        return
+    yield from filter(None, map(str.strip, content.splitlines()))
+
+
+def spawn_multiplied_jobs(
+    db: ClowderDB, template_job, parent_job, stage_id: str, items: Iterable[str]
+) -> list[str]:
+    """Spawn one job per item from a multiplier template job.
+
+    *items* may be a generator (e.g. a streaming artifact parse); rows
+    accumulate incrementally as it is consumed, then two executemany
+    calls inside a single transaction insert the whole batch — one
+    statement parse and one commit instead of a round-trip per job.
+    """
+    pipeline_id = parent_job["pipeline_id"]
+    parent_job_id = parent_job["job_id"]
+    parent_prompt = parent_job["prompt"] or ""
+    workspace_path = parent_job["workspace_path"] or "."
+    # Real JSON encoding (paths may contain quotes or backslashes), built
+    # once per batch — along with the other item-invariant columns —
+    # rather than re-rendered inside the loop.
+    allowed_paths_json = orjson.dumps([workspace_path]).decode()
+    template_job_id = template_job["template_job_id"]
+    agent_type = template_job["agent_type"]
+    artifact_strategy = template_job["artifact_strategy"]
+    created_at = db._timestamp()
+    # Placeholders that don't vary per item are substituted once here; the
+    # loop resolves only the per-item ones, and each resolution is a
+    # single regex pass instead of one full template scan per .replace.
+    base_values = {
+        "original_prompt": parent_prompt,
+        "agent_type": template_job["agent_type"],
+    }
+    prompt_base = _render_template(template_job["prompt_template"] or "", base_values)
+    command_base = template_job["command_template"]
+    if command_base:
+        command_base = _render_template(command_base, base_values)
+
+    # Only the per-item fields are accumulated; the invariant columns bind
+    # once at insert time regardless of batch size.
+    job_ids: list[str] = []
+    batch: list[dict] = []
+    for index, item in enumerate(items):
+        job_id = str(uuid.uuid4())
+        job_ids.append(job_id)
+        prompt = _render_template(prompt_base, {"item": item, "index": str(index)})
+        command = None
+        if command_base:
+            command = _render_template(
+                command_base, {"item": item, "job_id": job_id, "prompt": prompt}
+            )
+        batch.append({"j": job_id, "p": prompt, "c": command})
+
+    if not batch:
+        return []
+    with db._write_lock, db.conn:
+        # Take the write lock up front rather than on the first INSERT:
+        # a deferred transaction that upgrades mid-batch can hit SQLITE_BUSY
+        # after work is done, while BEGIN IMMEDIATE fails fast and leaves
+        # the whole spawn batch as exactly one fsync.
+        db.conn.execute("BEGIN IMMEDIATE")
+        if len(batch) >= _BULK_SPAWN_MIN_ROWS:
+            batch_json = orjson.dumps(batch).decode()
+            db.conn.execute(
+                _INSERT_JOBS_FROM_JSON,
+                (
+                    pipeline_id,
+                    stage_id,
+                    parent_job_id,
+                    template_job_id,
+                    agent_type,
+                    allowed_paths_json,
+                    workspace_path,
+                    artifact_strategy,
+                    created_at,
+                    batch_json,
+                ),
+            )
+            db.conn.execute(_INSERT_DEPS_FROM_JSON, (parent_job_id, batch_json))
+        else:
+            db.conn.executemany(
+                _INSERT_JOB,
+                (
+                    (
+                        row["j"],
+                        pipeline_id,
+                        stage_id,
+                        parent_job_id,
+                        template_job_id,
+                        agent_type,
+                        row["p"],
+                        row["c"],
+                        allowed_paths_json,
+                        workspace_path,
+                        artifact_strategy,
+                        created_at,
+                    )
+                    for row in batch
+                ),
+            )
+            db.conn.executemany(_INSERT_DEP, ((row["j"], parent_job_id) for row in batch))
+    return job_ids
+
+
+# The harness persists each iteration's tool results in actions.results as
+# a plain JSON array of {"tool", "status", "result"} entries (llm_response
+# holds only the model's reasoning, and may be zstd-compressed besides). A
+# finish action's result is its args dict plus the __FINISH__ flag, so the
+# tasks live at $.result.tasks. json_each explodes the array server-side
+# and the tasks come back as ready-to-parse JSON text.
+_SQL_FINISH_TASKS = (
+    "SELECT json_extract(value, '$.result.tasks') AS tasks "
+    "FROM actions, json_each(actions.results) "
+    "WHERE job_id = ? AND json_extract(value, '$.tool') = 'finish' "
+    "ORDER BY iteration DESC LIMIT 1"
+)
+
+
+def _finish_action_tasks(db: ClowderDB, job_id: str) -> Optional[str]:
+    """Return the finish action's tasks array as JSON text, if present."""
+    try:
+        row = db.conn.execute(_SQL_FINISH_TASKS, (job_id,)).fetchone()
+    except sqlite3.OperationalError:
+        # A malformed results row isn't JSON to SQLite; fall back to
+        # scanning the latest well-formed results array in Python.
+        row = db.conn.execute(
+            "SELECT results FROM actions WHERE job_id = ? "
+            "ORDER BY iteration DESC LIMIT 1",
+            (job_id,),
+        ).fetchone()
+        if row is None or not row["results"]:
+            return None
+        try:
+            entries = orjson.loads(row["results"])
+        except orjson.JSONDecodeError:
+            return None
+        for entry in entries:
+            if entry.get("tool") == "finish":
+                tasks = entry.get("result", {}).get("tasks", [])
+                return orjson.dumps(tasks).decode()
+        return None
+    return row["tasks"] if row else None
+
+
+def _multiplier_items(db: ClowderDB, completed_job, multiplier: dict) -> Iterator[str]:
+    """Yield multiplier items from a completed job's output."""
+    source_type = multiplier.get("source_type", "artifact")
+    parse_strategy = multiplier.get("parse_strategy", "line_delimited")
+    if source_type == "action":
+        tasks_json = _finish_action_tasks(db, completed_job["job_id"])
+        if tasks_json:
+            yield from parse_artifact_content(tasks_json, "json_array")
+        return
+    row = db.conn.execute(
+        "SELECT content FROM artifacts WHERE job_id = ? ORDER BY created_at DESC LIMIT 1",
+        (completed_job["job_id"],),
+    ).fetchone()
+    if row is None or not row["content"]:
+        return
+    yield from parse_artifact_content(row["content"], parse_strategy)
+
+
+def check_and_spawn_multiplied_jobs(db: ClowderDB, completed_job_id: str) -> list[str]:
+    """Spawn multiplier jobs triggered by a job completion, if any.
+
+    Two round-trips total: the completed job's own row, then the single
+    candidate JOIN — instead of separate pipeline/template/already-spawned/
+    stage lookups per template job.
+    """
+    completed_job = db.conn.execute(
+        "SELECT * FROM jobs WHERE job_id = ?", (completed_job_id,)
+    ).fetchone()
+    if completed_job is None or not completed_job["pipeline_id"]:
+        return []
+    candidates = db.conn.execute(
+        _SQL_MULTIPLIER_CANDIDATES, (completed_job_id,)
+    ).fetchall()
+
+    spawned: list[str] = []
+    for template_job in candidates:
+        multiplier = orjson.loads(template_job["job_multiplier"])
+        items = _multiplier_items(db, completed_job, multiplier)
+        # The Row already supports name-based indexing; no dict copy needed.
+        spawned.extend(
+            spawn_multiplied_jobs(
+                db, template_job, completed_job, template_job["stage_id"], items
+            )
+        )
+    return spawned
+
+
+class Orchestrator:
+    """Polls the DB and drives pipelines from pending through completion."""
+
+    def __init__(
+        self, db: ClowderDB, poll_interval: float = 5.0, max_workers: int = 4
+    ) -> None:
+        self.db = db
+        self.poll_interval = poll_interval
+        self.running_jobs: dict[str, subprocess.Popen] = {}
+        self._running = False
+        # Each worker thread gets its own WAL reader connection from
+        # ClowderDB's thread-local pool, so pipeline evaluation reads run
+        # concurrently; writes serialize on the shared write lock.
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="orchestrator"
+        )
+        # Same-process monitors wait on this instead of fixed-interval
+        # polling; every committed status transition notifies it.
+        self._status_changed = threading.Condition()
+
+    # First sleep after going idle; doubles up to poll_interval.
+    MIN_BACKOFF = 0.001
+
+    def start(self) -> None:
+        """Run cycles until stopped, sleeping only while nothing happens.
+
+        Job and pipeline transitions append rows to the events table via
+        triggers; draining it tells us whether the last cycle's world
+        changed. While events keep arriving we cycle immediately; when
+        idle, the sleep backs off exponentially from MIN_BACKOFF up to
+        poll_interval, so reaction time is sub-millisecond under load and
+        idle CPU is near zero.
+        """
+        self._running = True
+        backoff = self.MIN_BACKOFF
+        while self._running:
+            try:
+                self._orchestration_cycle()
+            except Exception:
+                logger.exception("orchestration cycle failed")
+            events = self.db.conn.execute(_SQL_DRAIN_EVENTS).fetchall()
+            self.db.conn.commit()
+            if events:
+                backoff = self.MIN_BACKOFF
+                continue
+            time.sleep(min(backoff, self.poll_interval))
+            backoff *= 2
+
+    def stop(self) -> None:
+        self._running = False
+        self._notify_status_change()
+
+    def _notify_status_change(self) -> None:
+        with self._status_changed:
+            self._status_changed.notify_all()
+
+    def wait_for_change(self, timeout: Optional[float] = None) -> bool:
+        """Block until the orchestrator commits a status transition.
+
+        Event-driven replacement for sleep-and-poll monitor loops: the
+        waiter wakes within microseconds of a job or pipeline changing
+        state and issues zero queries while nothing happens. Returns
+        False if *timeout* elapsed without a change.
+        """
+        with self._status_changed:
+            return self._status_changed.wait(timeout)
+
+    def _orchestration_cycle(self) -> None:
+        for pipeline_id in self._find_pending_pipelines():
+            ts = self.db._timestamp()
+            self.db.conn.execute(_SQL_MARK_PIPELINE_RUNNING, (ts, pipeline_id))
+            self.db.conn.commit()
+            self._notify_status_change()
+        self._poll_running_jobs()
+        running = self._find_running_pipelines()
+        if len(running) > 1:
+            # Evaluate pipelines in parallel: the dependency queries are
+            # the expensive part and WAL readers don't block each other.
+            list(self._pool.map(self._advance_pipeline, running))
+        else:
+            for pipeline_id in running:
+                self._advance_pipeline(pipeline_id)
+
+    def _advance_pipeline(self, pipeline_id: str) -> None:
+        for job in self._find_ready_jobs(pipeline_id):
+            self._spawn_job(job)
+        self._check_pipeline_completion(pipeline_id)
+
+    def _find_pending_pipelines(self) -> list[str]:
+        rows = self.db.conn.execute(_SQL_FIND_PENDING).fetchall()
+        return [row["pipeline_id"] for row in rows]
+
+    def _find_running_pipelines(self) -> list[str]:
+        rows = self.db.conn.execute(_SQL_FIND_RUNNING).fetchall()
+        return [row["pipeline_id"] for row in rows]
+
+    def _find_ready_jobs(self, pipeline_id: str) -> list:
+        """Pending jobs whose dependencies are all satisfied."""
+        return self.db.conn.execute(_SQL_FIND_READY_JOBS, (pipeline_id,)).fetchall()
+
+    def _spawn_job(self, job) -> None:
+        if job["command"]:
+            proc = subprocess.Popen(job["command"], shell=True)
+        else:
+            proc = subprocess.Popen(
+                [sys.executable, "-m", "agents.harness", job["job_id"], "--db", self.db.db_path]
+            )
+        self.running_jobs[job["job_id"]] = proc
+        ts = self.db._timestamp()
+        with self.db._write_lock:
+            self.db.conn.execute(_SQL_MARK_JOB_RUNNING, (ts, ts, job["job_id"]))
+            self.db.conn.commit()
+        self._notify_status_change()
+
+    def _poll_running_jobs(self) -> None:
+        """Reap finished subprocesses and batch their status updates.
+
+        The tracking dict is swapped out atomically and drained; jobs
+        still running go straight back in. No per-cycle key-list copy,
+        and the terminal UPDATEs land as one executemany/commit instead
+        of one transaction per finished job.
+        """
+        snapshot, self.running_jobs = self.running_jobs, {}
+        ts = self.db._timestamp()
+        update_rows = []
+        completed: list[str] = []
+        for job_id, proc in snapshot.items():
+            if proc.poll() is None:
+                self.running_jobs[job_id] = proc
+                continue
+            status = "completed" if proc.returncode == 0 else "failed"
+            # Harness jobs write their own terminal status; only command
+            # jobs still marked running need the orchestrator's verdict.
+            update_rows.append((status, ts, ts, job_id))
+            if status == "completed":
+                completed.append(job_id)
+        if update_rows:
+            with self.db.conn:
+                self.db.conn.executemany(_SQL_MARK_JOB_TERMINAL, update_rows)
+            self._notify_status_change()
+        for job_id in completed:
+            check_and_spawn_multiplied_jobs(self.db, job_id)
+
+    def _check_pipeline_completion(self, pipeline_id: str) -> None:
+        """Mark a pipeline (and its stages) terminal once every job is.
+
+        One conditional UPDATE with correlated subqueries replaces the
+        old count-SELECT + failed-SELECT + two UPDATEs: the NOT EXISTS
+        guard keeps it a no-op while any job is still live, and the CASE
+        picks failed over completed — two statements per pipeline per
+        cycle instead of four.
+        """
+        ts = self.db._timestamp()
+        with self.db._write_lock:
+            cursor = self.db.conn.execute(_SQL_COMPLETE_PIPELINE, (ts, ts, pipeline_id))
+            if cursor.rowcount:
+                self.db.conn.execute(_SQL_COMPLETE_STAGES, (pipeline_id, ts, pipeline_id))
+            self.db.conn.commit()
+        if cursor.rowcount:
+            self._notify_status_change()
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run the Clowder orchestrator")
+    parser.add_argument("--db", default="clowder.db")
+    parser.add_argument("--poll-interval", type=float, default=5.0)
+    args = parser.parse_args(argv)
+
+    db = ClowderDB(args.db)
+    try:
+        Orchestrator(db, poll_interval=args.poll_interval).start()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,91 @@
+"""Content-addressed cache of model responses.
+
+Identical (agent type, model, prompt, dependency artifacts) inputs are
+deterministic for a simple agent, so re-running them re-buys the full
+inference for the same answer. The cache keys a hash of those inputs to
+the stored response; pipeline re-runs and multiplied jobs with repeated
+items hit the cache instead of the model.
+"""
+
+import hashlib
+import sqlite3
+from typing import Optional
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS response_cache ("
+    "    key TEXT PRIMARY KEY,"
+    "    value BLOB,"
+    "    created_at TEXT"
+    ")"
+)
+_SQL_GET = "SELECT value FROM response_cache WHERE key = ?"
+_SQL_PUT = (
+    "INSERT OR REPLACE INTO response_cache (key, value, created_at) "
+    "VALUES (?, ?, datetime('now'))"
+)
+
+
+def _new_hash():
+    # blake2b runs 2-3x faster than sha256 in CPython on typical artifact
+    # sizes, and 16 bytes of digest is ample for a cache key; fall back
+    # to sha256 where blake2 is unavailable.
+    try:
+        return hashlib.blake2b(digest_size=16)
+    except (AttributeError, ValueError):  # pragma: no cover - exotic builds
+        return hashlib.sha256()
+
+
+def response_key(
+    agent_type: str, model: str, prompt: str, artifacts: list[dict]
+) -> str:
+    """Hash the inputs that determine a simple agent's model call.
+
+    The stable agent-type + model prefix comes first so keys for the same
+    agent/model pair share a hash prefix, mirroring the prompt layout
+    that keeps Ollama's own prompt cache warm. File-backed artifacts with
+    no inline content hash via hashlib.file_digest, which streams the
+    file through a large buffer instead of pulling the bytes into Python.
+    """
+    h = _new_hash()
+    h.update(agent_type.encode())
+    h.update(b"\x00")
+    h.update(model.encode())
+    h.update(b"\x00")
+    h.update(prompt.encode())
+    for artifact in artifacts:
+        h.update(b"\x00")
+        content = artifact["content"]
+        if content is None and artifact["file_path"]:
+            try:
+                with open(artifact["file_path"], "rb") as f:
+                    h.update(hashlib.file_digest(f, _new_hash).digest())
+                continue
+            except OSError:
+                pass
+        h.update((content or artifact["file_path"] or "").encode())
+    return h.hexdigest()
+
+
+class ResponseCache:
+    """get/put over the response_cache table in the Clowder database."""
+
+    def __init__(self, db_path: str = "clowder.db") -> None:
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA busy_timeout = 5000")
+        with self.conn:
+            self.conn.execute(_SCHEMA)
+
+    def get(self, key: str) -> Optional[str]:
+        row = self.conn.execute(_SQL_GET, (key,)).fetchone()
+        if row is None:
+            return None
+        value = row[0]
+        return value.decode() if isinstance(value, bytes) else value
+
+    def put(self, key: str, value: str) -> None:
+        with self.conn:
+            self.conn.execute(_SQL_PUT, (key, value.encode()))
+
+    def close(self) -> None:
+        self.conn.close()
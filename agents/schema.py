@@ -0,0 +1,121 @@
+"""LLM response schema and validation.
+
+The model must reply with a single JSON object:
+
+    {
+        "reasoning": "optional free-text scratchpad",
+        "actions": [
+            {"tool": "read_file", "args": {"path": "src/main.py"}},
+            ...
+        ]
+    }
+"""
+
+import json
+from dataclasses import dataclass
+from typing import Any, Optional, Union
+
+try:
+    import msgspec
+except ImportError:  # msgspec is optional; the pure-Python validator remains
+    msgspec = None
+
+
+class ValidationError(ValueError):
+    """Raised when an LLM response does not match the expected schema."""
+
+
+# With msgspec, Action and LLMResponse *are* the decode targets: the
+# decoder validates and materializes them in one C pass, and what it
+# returns is handed to callers as-is — no per-action rebuild into separate
+# public types. The dataclass fallback keeps the identical field surface.
+if msgspec is not None:
+    from typing import Annotated
+
+    class Action(msgspec.Struct, forbid_unknown_fields=True):
+        tool: Annotated[str, msgspec.Meta(min_length=1)]
+        args: dict[str, Any] = {}
+
+    class LLMResponse(msgspec.Struct, forbid_unknown_fields=True):
+        actions: list[Action]
+        reasoning: Optional[str] = None
+
+    _DECODER = msgspec.json.Decoder(LLMResponse)
+
+else:
+
+    @dataclass
+    class Action:
+        tool: str
+        args: dict[str, Any]
+
+    @dataclass
+    class LLMResponse:
+        actions: list[Action]
+        reasoning: Optional[str] = None
+
+
+def decode_llm_response(raw: Union[str, bytes]) -> LLMResponse:
+    """Parse raw LLM output and validate it in a single pass.
+
+    With msgspec available, JSON decoding and schema validation happen in
+    one C pass that yields the LLMResponse directly; otherwise this falls
+    back to json.loads plus validate_llm_response.
+    """
+    if msgspec is not None:
+        try:
+            decoded = _DECODER.decode(raw)
+        except (msgspec.DecodeError, msgspec.ValidationError) as e:
+            raise ValidationError(str(e)) from e
+        if not decoded.actions:
+            raise ValidationError("'actions' must contain at least one action")
+        return decoded
+    try:
+        data = json.loads(raw)
+    except json.JSONDecodeError as e:
+        raise ValidationError(f"LLM returned invalid JSON: {e}") from e
+    return LLMResponse(actions=validate_llm_response(data), reasoning=data.get("reasoning"))
+
+
+# Shared across calls; the happy path tests membership with a subset
+# comparison against these instead of allocating fresh sets per response.
+_ALLOWED_FIELDS = frozenset({"reasoning", "actions"})
+_ALLOWED_ACTION_FIELDS = frozenset({"tool", "args"})
+
+
+def validate_llm_response(data: Any) -> list[Action]:
+    """Validate a parsed LLM response and return its list of actions.
+
+    Raises ValidationError with a message suitable for feeding back to the
+    model on the next iteration.
+    """
+    if not isinstance(data, dict):
+        raise ValidationError(f"Response must be a JSON object, got {type(data).__name__}")
+
+    # keys() <= frozenset checks the subset relation without building a
+    # difference set; only the (rare) error path pays for one.
+    if not data.keys() <= _ALLOWED_FIELDS:
+        unknown = set(data) - _ALLOWED_FIELDS
+        raise ValidationError(f"Unknown fields in response: {sorted(unknown)}")
+
+    actions = data.get("actions")
+    if not isinstance(actions, list):
+        raise ValidationError("'actions' must be a list")
+    if not actions:
+        raise ValidationError("'actions' must contain at least one action")
+
+    validated = []
+    for i, action in enumerate(actions):
+        if not isinstance(action, dict):
+            raise ValidationError(f"actions[{i}] must be an object")
+        if not action.keys() <= _ALLOWED_ACTION_FIELDS:
+            unknown = set(action) - _ALLOWED_ACTION_FIELDS
+            raise ValidationError(f"actions[{i}] has unknown fields: {sorted(unknown)}")
+        tool = action.get("tool")
+        if not isinstance(tool, str) or not tool:
+            raise ValidationError(f"actions[{i}].tool must be a non-empty string")
+        args = action.get("args", {})
+        if not isinstance(args, dict):
+            raise ValidationError(f"actions[{i}].args must be an object")
+        validated.append(Action(tool=tool, args=args))
+    return validated
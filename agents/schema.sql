@@ -0,0 +1,177 @@
+-- Clowder database schema.
+
+CREATE TABLE IF NOT EXISTS tasks (
+    task_id         TEXT PRIMARY KEY,
+    prompt          TEXT NOT NULL,
+    model           TEXT NOT NULL,
+    timeout_seconds INTEGER NOT NULL DEFAULT 600,
+    created_at      TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS agent_state (
+    task_id          TEXT PRIMARY KEY REFERENCES tasks(task_id),
+    status           TEXT NOT NULL DEFAULT 'pending',
+    iteration        INTEGER NOT NULL DEFAULT 0,
+    started_at       TEXT,
+    -- Epoch twin of started_at: the hot termination check reads this and
+    -- skips ISO-string parsing; the TEXT column stays for human display.
+    started_at_epoch REAL,
+    updated_at       TEXT
+);
+
+CREATE TABLE IF NOT EXISTS pipelines (
+    pipeline_id     TEXT PRIMARY KEY,
+    original_prompt TEXT,
+    template_id     TEXT,
+    status          TEXT NOT NULL DEFAULT 'pending',
+    created_at      TEXT NOT NULL,
+    updated_at      TEXT,
+    completed_at    TEXT
+);
+
+CREATE TABLE IF NOT EXISTS stages (
+    stage_id    TEXT PRIMARY KEY,
+    pipeline_id TEXT NOT NULL REFERENCES pipelines(pipeline_id),
+    name        TEXT NOT NULL,
+    stage_order INTEGER NOT NULL,
+    status      TEXT NOT NULL DEFAULT 'pending',
+    created_at  TEXT NOT NULL,
+    updated_at  TEXT
+);
+
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id            TEXT PRIMARY KEY,
+    pipeline_id       TEXT REFERENCES pipelines(pipeline_id),
+    stage_id          TEXT REFERENCES stages(stage_id),
+    parent_job_id     TEXT,
+    template_job_id   TEXT,
+    agent_type        TEXT NOT NULL DEFAULT 'simple',
+    prompt            TEXT,
+    command           TEXT,
+    status            TEXT NOT NULL DEFAULT 'pending',
+    iteration         INTEGER NOT NULL DEFAULT 0,
+    allowed_paths     TEXT,
+    workspace_path    TEXT,
+    artifact_strategy TEXT,
+    retry_strategy    TEXT,
+    final_output      TEXT,
+    created_at        TEXT NOT NULL,
+    updated_at        TEXT,
+    started_at        TEXT,
+    completed_at      TEXT
+);
+
+CREATE TABLE IF NOT EXISTS job_dependencies (
+    job_id            TEXT NOT NULL REFERENCES jobs(job_id),
+    depends_on_job_id TEXT NOT NULL REFERENCES jobs(job_id),
+    dependency_type   TEXT NOT NULL DEFAULT 'success',
+    -- The PK's implicit unique index doubles as the (job_id, ...) lookup
+    -- path for the ready-jobs aggregation; no separate index needed.
+    PRIMARY KEY (job_id, depends_on_job_id)
+);
+
+-- The orchestrator's per-cycle pending/running scans filter on exactly
+-- this pair.
+CREATE INDEX IF NOT EXISTS idx_jobs_pipeline_status ON jobs(pipeline_id, status);
+
+CREATE TABLE IF NOT EXISTS actions (
+    action_id    INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id       TEXT NOT NULL,
+    iteration    INTEGER NOT NULL,
+    -- BLOB affinity: llm_response and raw_stdout may hold zstd frames
+    -- (detected by magic-byte prefix on read); results and raw_stderr stay
+    -- TEXT so failed_actions_summary can filter and preview them in SQL.
+    llm_response BLOB,
+    results      TEXT,
+    raw_stdout   BLOB,
+    raw_stderr   TEXT,
+    timestamp    TEXT NOT NULL
+);
+
+-- Serves the per-iteration "last N actions for this job, newest first"
+-- context rebuild — and the orchestrator's last-action multiplier lookup —
+-- as a reverse index-range seek; the included payload columns make it
+-- covering, so these queries never touch the table heap.
+CREATE INDEX IF NOT EXISTS idx_actions_job_iter_cov
+    ON actions(job_id, iteration DESC, llm_response, results);
+
+-- Narrow projection for failure triage: omits the large llm_response /
+-- results / raw_stdout columns and truncates stderr, so scanning failures
+-- reads a fraction of the bytes per row.
+CREATE VIEW IF NOT EXISTS failed_actions_summary AS
+SELECT action_id,
+       job_id,
+       iteration,
+       timestamp,
+       substr(raw_stderr, 1, 512) AS stderr_preview
+FROM actions
+WHERE results LIKE '%"error"%';
+
+-- Lightweight change feed for the orchestrator: triggers append a row on
+-- transitions it cares about, and the orchestration loop drains the table
+-- with DELETE ... RETURNING instead of re-polling on a fixed interval.
+CREATE TABLE IF NOT EXISTS events (
+    event_id   INTEGER PRIMARY KEY AUTOINCREMENT,
+    type       TEXT NOT NULL,
+    created_at TEXT
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_events_job_terminal
+AFTER UPDATE OF status ON jobs
+WHEN NEW.status IN ('completed', 'failed')
+BEGIN
+    INSERT INTO events (type, created_at) VALUES ('job:' || NEW.status, datetime('now'));
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_events_pipeline_created
+AFTER INSERT ON pipelines
+BEGIN
+    INSERT INTO events (type, created_at) VALUES ('pipeline:created', datetime('now'));
+END;
+
+CREATE TABLE IF NOT EXISTS artifacts (
+    artifact_id   TEXT PRIMARY KEY,
+    job_id        TEXT NOT NULL,
+    pipeline_id   TEXT,
+    name          TEXT NOT NULL,
+    artifact_type TEXT NOT NULL,
+    file_path     TEXT,
+    content       TEXT,
+    content_hash  TEXT,
+    size_bytes    INTEGER,
+    metadata      TEXT,
+    created_at    TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_artifacts_hash ON artifacts(content_hash);
+
+CREATE TABLE IF NOT EXISTS templates (
+    template_id TEXT PRIMARY KEY,
+    name        TEXT NOT NULL,
+    description TEXT,
+    created_at  TEXT
+);
+
+CREATE TABLE IF NOT EXISTS template_stages (
+    template_stage_id TEXT PRIMARY KEY,
+    template_id       TEXT NOT NULL REFERENCES templates(template_id),
+    name              TEXT NOT NULL,
+    stage_order       INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS template_jobs (
+    template_job_id   TEXT PRIMARY KEY,
+    template_stage_id TEXT NOT NULL REFERENCES template_stages(template_stage_id),
+    agent_type        TEXT NOT NULL DEFAULT 'simple',
+    prompt_template   TEXT,
+    command_template  TEXT,
+    job_multiplier    TEXT,
+    artifact_strategy TEXT
+);
+
+CREATE TABLE IF NOT EXISTS template_job_dependencies (
+    template_job_id            TEXT NOT NULL REFERENCES template_jobs(template_job_id),
+    depends_on_template_job_id TEXT NOT NULL REFERENCES template_jobs(template_job_id),
+    dependency_type            TEXT NOT NULL DEFAULT 'success',
+    PRIMARY KEY (template_job_id, depends_on_template_job_id)
+);
@@ -0,0 +1,182 @@
+"""Simple agent: one prompt, one model call, one output.
+
+Unlike the full agent loop, a simple agent gathers its job's prompt and the
+artifacts of its dependencies, makes a single model call, and records the
+response as its final output. Used for planner/worker/verifier-style
+pipeline stages that don't need tools.
+"""
+
+import argparse
+import atexit
+import functools
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+import orjson
+import requests
+
+from .response_cache import ResponseCache, response_key
+
+OLLAMA_GENERATE_URL = "http://localhost:11434/api/generate"
+DEFAULT_MODEL = "qwen2.5-coder:7b"
+
+# One connection for every model call in the process: TCP setup and TLS-free
+# HTTP keep-alive are paid once, and keep_alive keeps the model weights
+# resident server-side between calls instead of reloading per invocation.
+SESSION = requests.Session()
+
+
+def call_ollama(prompt: str, model: str = DEFAULT_MODEL, num_ctx: int = 8192) -> str:
+    """Run one generation against the local Ollama server."""
+    response = SESSION.post(
+        OLLAMA_GENERATE_URL,
+        json={
+            "model": model,
+            "prompt": prompt,
+            "stream": False,
+            "keep_alive": "30m",
+            "options": {"num_ctx": num_ctx},
+        },
+        timeout=600,
+    )
+    response.raise_for_status()
+    return response.json().get("response", "")
+
+
+def call_ollama_batch(
+    prompts: list[str], model: str = DEFAULT_MODEL, max_workers: int = 4
+) -> list[str]:
+    """Issue several generations concurrently over the shared session.
+
+    The session's connection pool keeps the sockets alive, so N prompts
+    cost N inference times overlapped, not N connection setups.
+    """
+    if not prompts:
+        return []
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(prompts))) as pool:
+        return list(pool.map(lambda p: call_ollama(p, model), prompts))
+
+
+@functools.lru_cache(maxsize=4)
+def _conn(db_path: str) -> sqlite3.Connection:
+    """One tuned connection per database path, opened on first use.
+
+    The open-query-close pattern paid a file open, schema parse, and cold
+    page cache per helper call; reusing the connection keeps hot pages in
+    RAM and the PRAGMAs applied once. atexit handles the close.
+    """
+    conn = sqlite3.connect(db_path, check_same_thread=False, cached_statements=256)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.executescript(
+        "PRAGMA synchronous = NORMAL;"
+        "PRAGMA busy_timeout = 5000;"
+        "PRAGMA cache_size = -20000;"
+        "PRAGMA temp_store = MEMORY;"
+    )
+    atexit.register(conn.close)
+    return conn
+
+
+def get_job_info(db_path: str, job_id: str):
+    """Fetch the job row for a simple-agent invocation."""
+    return _conn(db_path).execute(
+        "SELECT * FROM jobs WHERE job_id = ?", (job_id,)
+    ).fetchone()
+
+
+# Above this size, file-backed artifact content is read straight from
+# disk instead of round-tripping through SQLite's blob handling.
+_FILE_BACKED_MIN_BYTES = 8192
+
+
+def get_dependency_artifacts(db_path: str, job_id: str) -> list:
+    """Artifacts produced by the jobs this job depends on.
+
+    Large file-backed artifacts come back with NULL content from the
+    query — SQLite never materializes the blob — and are streamed from
+    their file instead; small or inline-only artifacts arrive as before.
+    Entries are sqlite3.Row except where the file read had to replace
+    content; both answer to ['col'] indexing.
+    """
+    rows = _conn(db_path).execute(
+        "SELECT a.name, a.file_path, "
+        "CASE WHEN a.file_path IS NOT NULL AND LENGTH(a.content) > ? "
+        "THEN NULL ELSE a.content END AS content "
+        "FROM artifacts a "
+        "JOIN job_dependencies jd ON jd.depends_on_job_id = a.job_id "
+        "WHERE jd.job_id = ? ORDER BY a.created_at",
+        (_FILE_BACKED_MIN_BYTES, job_id),
+    ).fetchall()
+    artifacts = []
+    for row in rows:
+        if row["content"] is None and row["file_path"]:
+            # Only rows needing the disk read pay a dict copy; the rest
+            # pass through as immutable sqlite3.Row objects.
+            artifact = dict(row)
+            try:
+                artifact["content"] = Path(artifact["file_path"]).read_text(
+                    encoding="utf-8"
+                )
+            except OSError:
+                pass  # fall through to the File: placeholder in the prompt
+            artifacts.append(artifact)
+        else:
+            artifacts.append(row)
+    return artifacts
+
+
+def build_prompt(job, artifacts: list[dict]) -> str:
+    # Accumulate pieces and join once: += on strings re-copies the whole
+    # prompt per artifact, which goes quadratic when a verifier pulls in
+    # many multi-kilobyte upstream outputs.
+    parts = [job["prompt"] or ""]
+    if artifacts:
+        parts.append("\n\n=== Context from previous jobs ===\n")
+        for artifact in artifacts:
+            parts.append(f"\n--- {artifact['name']} ---\n")
+            parts.append(artifact["content"] or f"File: {artifact['file_path']}")
+            parts.append("\n")
+    return "".join(parts)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run a simple Clowder agent")
+    parser.add_argument("job_id")
+    parser.add_argument("--db", default="clowder.db")
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    args = parser.parse_args(argv)
+
+    job = get_job_info(args.db, args.job_id)
+    if job is None:
+        print(f"Unknown job: {args.job_id}")
+        return 1
+    artifacts = get_dependency_artifacts(args.db, args.job_id)
+    prompt = build_prompt(job, artifacts)
+
+    # Identical (agent type, model, prompt, artifacts) means an identical
+    # model call — serve the cached response instead of re-inferring.
+    cache = ResponseCache(args.db)
+    key = response_key(job["agent_type"], args.model, prompt, artifacts)
+    output = cache.get(key)
+    if output is None:
+        output = call_ollama(prompt, args.model)
+        cache.put(key, output)
+
+    conn = _conn(args.db)
+    ts = datetime.now(timezone.utc).isoformat()
+    conn.execute(
+        "UPDATE jobs SET status = 'completed', final_output = ?, "
+        "completed_at = ?, updated_at = ? WHERE job_id = ?",
+        (orjson.dumps({"response": output}).decode(), ts, ts, args.job_id),
+    )
+    conn.commit()
+    print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
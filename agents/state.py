@@ -0,0 +1,218 @@
+"""File-backed task state for agents running without database access.
+
+Each task owns a directory under ``tasks_dir`` holding three files:
+``state.json`` (current status), ``heartbeat.json`` (liveness beacon,
+rewritten every iteration), and ``actions.jsonl`` (append-only action
+log). The harness and external monitors read these with plain file I/O,
+so a crashed agent leaves an inspectable trail behind.
+"""
+
+import os
+import tempfile
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import BinaryIO, Optional
+
+import orjson
+
+# Buffered appends accumulate this many log_action calls before flush();
+# the OS sees one write per group instead of an open+write+close per line.
+_FLUSH_EVERY = 16
+_ACTION_BUFFER_BYTES = 64 * 1024
+
+
+def _atomic_write_bytes(path: Path, data: bytes, durable: bool = False) -> None:
+    """Write *data* to *path* via a same-directory temp file and rename.
+
+    os.replace is atomic on POSIX, so concurrent readers see either the
+    old file or the new one — never a truncated in-between, which the
+    in-place write_bytes pattern allowed. *durable* adds an fsync before
+    the rename; heartbeats skip it since losing one beat on power failure
+    costs nothing.
+    """
+    fd = tempfile.NamedTemporaryFile(dir=path.parent, delete=False)
+    try:
+        fd.write(data)
+        fd.flush()
+        if durable:
+            os.fsync(fd.fileno())
+        fd.close()
+        os.replace(fd.name, path)
+    except BaseException:
+        fd.close()
+        os.unlink(fd.name)
+        raise
+
+
+@dataclass
+class TaskState:
+    task_id: str
+    prompt: str
+    model: str
+    status: str
+    iteration: int
+    timeout_seconds: int
+    started_at: str
+    updated_at: str
+    # Epoch twin of started_at: elapsed-time checks subtract two floats
+    # instead of parsing the ISO string. 0.0 marks state files written
+    # before the field existed.
+    started_at_epoch: float = 0.0
+
+
+@dataclass
+class Heartbeat:
+    task_id: str
+    iteration: int
+    beat_at: str
+
+
+class StateManager:
+    """Owns the per-task state files under a tasks directory."""
+
+    def __init__(self, tasks_dir: str = "tasks") -> None:
+        self.tasks_dir = Path(tasks_dir)
+        self.tasks_dir.mkdir(parents=True, exist_ok=True)
+        # Action-log file descriptors stay open for the task's lifetime
+        # with a large write buffer; the old open/write/close-per-entry
+        # pattern paid three syscalls (plus a directory-metadata update)
+        # for every logged action.
+        self._action_fds: dict[str, BinaryIO] = {}
+        self._unflushed: dict[str, int] = {}
+
+    @staticmethod
+    def _timestamp() -> str:
+        # Millisecond precision is plenty for state files and skips the
+        # microsecond zero-padding in the formatter.
+        return datetime.now(timezone.utc).isoformat(timespec="milliseconds")
+
+    def _task_dir(self, task_id: str) -> Path:
+        return self.tasks_dir / task_id
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def create_task(
+        self, prompt: str, model: str = "qwen2.5-coder:7b", timeout_seconds: int = 600
+    ) -> TaskState:
+        task_id = str(uuid.uuid4())
+        task_dir = self._task_dir(task_id)
+        task_dir.mkdir(parents=True)
+        now = self._timestamp()
+        state = TaskState(
+            task_id=task_id,
+            prompt=prompt,
+            model=model,
+            status="pending",
+            iteration=0,
+            timeout_seconds=timeout_seconds,
+            started_at=now,
+            updated_at=now,
+            started_at_epoch=time.time(),
+        )
+        self.write_state(state)
+        self.write_heartbeat(task_id, 0)
+        self._action_fds[task_id] = open(
+            task_dir / "actions.jsonl", "ab", buffering=_ACTION_BUFFER_BYTES
+        )
+        self._unflushed[task_id] = 0
+        return state
+
+    def close_task(self, task_id: str) -> None:
+        """Flush and durably close the task's action log."""
+        f = self._action_fds.pop(task_id, None)
+        self._unflushed.pop(task_id, None)
+        if f is not None:
+            f.flush()
+            os.fsync(f.fileno())
+            f.close()
+
+    # ------------------------------------------------------------------
+    # State and heartbeat
+    # ------------------------------------------------------------------
+
+    def write_state(self, state: TaskState) -> None:
+        state.updated_at = self._timestamp()
+        state_file = self._task_dir(state.task_id) / "state.json"
+        # orjson emits UTF-8 bytes directly (OPT_INDENT_2 keeps the file
+        # inspectable); the atomic rename means readers never retry on a
+        # half-written state.json. vars() hands orjson the instance dict
+        # as-is — TaskState is flat, so asdict's recursive deep copy
+        # bought nothing.
+        _atomic_write_bytes(
+            state_file,
+            orjson.dumps(vars(state), option=orjson.OPT_INDENT_2),
+            durable=True,
+        )
+
+    def read_state(self, task_id: str) -> Optional[TaskState]:
+        state_file = self._task_dir(task_id) / "state.json"
+        try:
+            data = orjson.loads(state_file.read_bytes())
+        except FileNotFoundError:
+            return None
+        return TaskState(**data)
+
+    def write_heartbeat(self, task_id: str, iteration: int) -> None:
+        beat = Heartbeat(task_id=task_id, iteration=iteration, beat_at=self._timestamp())
+        heartbeat_file = self._task_dir(task_id) / "heartbeat.json"
+        _atomic_write_bytes(
+            heartbeat_file, orjson.dumps(vars(beat), option=orjson.OPT_INDENT_2)
+        )
+
+    def read_heartbeat(self, task_id: str) -> Optional[Heartbeat]:
+        heartbeat_file = self._task_dir(task_id) / "heartbeat.json"
+        try:
+            data = orjson.loads(heartbeat_file.read_bytes())
+        except FileNotFoundError:
+            return None
+        return Heartbeat(**data)
+
+    # ------------------------------------------------------------------
+    # Action log
+    # ------------------------------------------------------------------
+
+    def log_action(self, task_id: str, entry: dict) -> None:
+        """Append one action entry to the task's JSONL log.
+
+        Writes land in the persistent buffered descriptor and reach the
+        OS in groups of ``_FLUSH_EVERY``; close_task performs the final
+        flush + fsync.
+        """
+        f = self._action_fds.get(task_id)
+        if f is None:
+            # Reattached to a task created by another process.
+            f = open(
+                self._task_dir(task_id) / "actions.jsonl",
+                "ab",
+                buffering=_ACTION_BUFFER_BYTES,
+            )
+            self._action_fds[task_id] = f
+            self._unflushed[task_id] = 0
+        f.write(orjson.dumps(entry) + b"\n")
+        self._unflushed[task_id] += 1
+        if self._unflushed[task_id] >= _FLUSH_EVERY:
+            f.flush()
+            self._unflushed[task_id] = 0
+
+    # ------------------------------------------------------------------
+    # Termination
+    # ------------------------------------------------------------------
+
+    def check_termination(self, state: TaskState) -> Optional[str]:
+        """Return a termination reason, or None if the task may continue."""
+        if state.status in ("completed", "failed"):
+            return state.status
+        if state.started_at_epoch:
+            elapsed = time.time() - state.started_at_epoch
+        else:
+            # State file predates started_at_epoch; parse the ISO string.
+            started = datetime.fromisoformat(state.started_at)
+            elapsed = (datetime.now(timezone.utc) - started).total_seconds()
+        if elapsed > state.timeout_seconds:
+            return "timeout"
+        return None
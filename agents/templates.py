@@ -0,0 +1,309 @@
+"""Pipeline templates: stored blueprints expanded into concrete pipelines.
+
+A template describes stages and the jobs within them; instantiating it
+creates a pipeline with concrete stage/job rows, rendering the prompt and
+command templates against the caller's original prompt and workspace.
+Multiplier template jobs are not instantiated here — the orchestrator
+spawns them at runtime from their source job's output.
+"""
+
+import functools
+import itertools
+import re
+import sqlite3
+import uuid
+from typing import Any, Callable, Optional
+
+import orjson
+
+from .db import ClowderDB
+
+# Hot SQL as module constants, matching the statement-cache idiom used
+# across the other modules: identical string objects keep sqlite3's
+# per-connection cache hitting instead of re-parsing per call.
+_SQL_INSERT_TEMPLATE = (
+    "INSERT INTO templates (template_id, name, description, created_at) "
+    "VALUES (?, ?, ?, ?)"
+)
+_SQL_INSERT_TEMPLATE_STAGE = (
+    "INSERT INTO template_stages (template_stage_id, template_id, name, stage_order) "
+    "VALUES (?, ?, ?, ?)"
+)
+_SQL_INSERT_TEMPLATE_JOB = (
+    "INSERT INTO template_jobs (template_job_id, template_stage_id, agent_type, "
+    "prompt_template, command_template, job_multiplier, artifact_strategy) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+_SQL_INSERT_TEMPLATE_DEP = (
+    "INSERT INTO template_job_dependencies (template_job_id, "
+    "depends_on_template_job_id, dependency_type) VALUES (?, ?, ?)"
+)
+_SQL_INSERT_PIPELINE = (
+    "INSERT INTO pipelines (pipeline_id, original_prompt, template_id, status, "
+    "created_at) VALUES (?, ?, ?, 'pending', ?)"
+)
+_SQL_INSERT_STAGE = (
+    "INSERT INTO stages (stage_id, pipeline_id, name, stage_order, status, "
+    "created_at) VALUES (?, ?, ?, ?, 'pending', ?)"
+)
+_SQL_INSERT_JOB = (
+    "INSERT INTO jobs (job_id, pipeline_id, stage_id, template_job_id, agent_type, "
+    "prompt, command, status, allowed_paths, workspace_path, artifact_strategy, "
+    "created_at) VALUES (?, ?, ?, ?, ?, ?, ?, 'pending', ?, ?, ?, ?)"
+)
+_SQL_INSERT_JOB_DEP = (
+    "INSERT INTO job_dependencies (job_id, depends_on_job_id, dependency_type) "
+    "VALUES (?, ?, ?)"
+)
+# One JOIN fetches every stage with its jobs in stage order (NULL job
+# columns for empty stages), ready to bucket with groupby — no per-stage
+# follow-up query.
+_SQL_TEMPLATE_TREE = (
+    "SELECT ts.template_stage_id, ts.name, ts.stage_order, tj.template_job_id, "
+    "tj.agent_type, tj.prompt_template, tj.command_template, tj.job_multiplier, "
+    "tj.artifact_strategy "
+    "FROM template_stages ts "
+    "LEFT JOIN template_jobs tj ON tj.template_stage_id = ts.template_stage_id "
+    "WHERE ts.template_id = ? ORDER BY ts.stage_order"
+)
+_SQL_TEMPLATE_DEPS = (
+    "SELECT d.* FROM template_job_dependencies d "
+    "JOIN template_jobs tj ON tj.template_job_id = d.template_job_id "
+    "JOIN template_stages ts ON ts.template_stage_id = tj.template_stage_id "
+    "WHERE ts.template_id = ?"
+)
+
+_PLACEHOLDER_RE = re.compile(r"\{\{(\w+)\}\}")
+
+
+@functools.lru_cache(maxsize=256)
+def _compile_template(template: str) -> Callable[[dict], str]:
+    """Pre-split a template into literal/placeholder tokens once.
+
+    Rendering then joins the tokens in a single pass; the chained
+    str.replace approach re-scanned (and re-allocated) the whole string
+    once per placeholder for every job. Templates repeat across jobs and
+    instantiations, so the compiled form is cached by string identity.
+    Unknown placeholders render back as themselves, leaving runtime
+    substitutions (e.g. multiplier items) intact.
+    """
+    parts = _PLACEHOLDER_RE.split(template)
+    if len(parts) == 1:
+        return lambda values: template
+    literals = parts[0::2]
+    names = parts[1::2]
+
+    def render(values: dict) -> str:
+        out = [literals[0]]
+        for name, literal in zip(names, literals[1:]):
+            out.append(str(values.get(name, f"{{{{{name}}}}}")))
+            out.append(literal)
+        return "".join(out)
+
+    return render
+
+
+class TemplateManager:
+    """Creates, reads, and instantiates pipeline templates."""
+
+    def __init__(self, db: ClowderDB) -> None:
+        self.db = db
+
+    def create_template(
+        self, name: str, description: str, stages: list[dict]
+    ) -> str:
+        """Store a template definition.
+
+        *stages* is a list of ``{"name": ..., "jobs": [...]}`` where each
+        job dict may carry agent_type, prompt_template, command_template,
+        job_multiplier, artifact_strategy, and ``depends_on`` — a list of
+        other jobs' ``name`` keys within the same template.
+        """
+        template_id = str(uuid.uuid4())
+        created_at = self.db._timestamp()
+        stage_rows = []
+        job_rows = []
+        dep_specs: list[tuple[str, str, str]] = []
+        job_ids_by_name: dict[str, str] = {}
+        for order, stage in enumerate(stages):
+            stage_id = str(uuid.uuid4())
+            stage_rows.append((stage_id, template_id, stage["name"], order))
+            for job in stage.get("jobs", []):
+                job_id = str(uuid.uuid4())
+                if "name" in job:
+                    job_ids_by_name[job["name"]] = job_id
+                multiplier = job.get("job_multiplier")
+                job_rows.append(
+                    (
+                        job_id,
+                        stage_id,
+                        job.get("agent_type", "simple"),
+                        job.get("prompt_template"),
+                        job.get("command_template"),
+                        orjson.dumps(multiplier).decode() if multiplier else None,
+                        job.get("artifact_strategy"),
+                    )
+                )
+                for dep_name in job.get("depends_on", []):
+                    dep_specs.append((job_id, dep_name, job.get("dependency_type", "success")))
+
+        with self.db._write_lock, self.db.conn:
+            self.db.conn.execute(
+                _SQL_INSERT_TEMPLATE, (template_id, name, description, created_at)
+            )
+            self.db.conn.executemany(_SQL_INSERT_TEMPLATE_STAGE, stage_rows)
+            self.db.conn.executemany(_SQL_INSERT_TEMPLATE_JOB, job_rows)
+            self.db.conn.executemany(
+                _SQL_INSERT_TEMPLATE_DEP,
+                (
+                    (job_id, job_ids_by_name[dep_name], dep_type)
+                    for job_id, dep_name, dep_type in dep_specs
+                ),
+            )
+        return template_id
+
+    def list_templates(self) -> list[sqlite3.Row]:
+        # Rows support ['col'] access directly; callers that serialize
+        # convert at the boundary (db.to_dict_list) instead of paying a
+        # dict allocation per row here.
+        return self.db.conn.execute(
+            "SELECT * FROM templates ORDER BY created_at"
+        ).fetchall()
+
+    def get_template(self, template_id: str) -> Optional[dict]:
+        """Return a template with its stages, jobs, and dependencies.
+
+        Three queries regardless of template size: the template row, one
+        stage+job JOIN bucketed with groupby (stage_order sorting makes
+        rows arrive already grouped), and one dependency JOIN — instead
+        of one query per stage plus nested IN subqueries.
+        """
+        template = self.db.conn.execute(
+            "SELECT * FROM templates WHERE template_id = ?", (template_id,)
+        ).fetchone()
+        if template is None:
+            return None
+        result: dict[str, Any] = dict(template)
+        result["stages"] = []
+        tree_rows = self.db.conn.execute(_SQL_TEMPLATE_TREE, (template_id,)).fetchall()
+        for _, stage_rows in itertools.groupby(
+            tree_rows, key=lambda row: row["template_stage_id"]
+        ):
+            rows = list(stage_rows)
+            first = rows[0]
+            stage = {
+                "template_stage_id": first["template_stage_id"],
+                "template_id": template_id,
+                "name": first["name"],
+                "stage_order": first["stage_order"],
+                "jobs": [
+                    {
+                        "template_job_id": row["template_job_id"],
+                        "template_stage_id": row["template_stage_id"],
+                        "agent_type": row["agent_type"],
+                        "prompt_template": row["prompt_template"],
+                        "command_template": row["command_template"],
+                        "job_multiplier": row["job_multiplier"],
+                        "artifact_strategy": row["artifact_strategy"],
+                    }
+                    for row in rows
+                    if row["template_job_id"] is not None
+                ],
+            }
+            result["stages"].append(stage)
+        # Dependency rows stay sqlite3.Row; instantiate_template indexes
+        # them by column name, so the per-row dict copy bought nothing.
+        result["dependencies"] = self.db.conn.execute(
+            _SQL_TEMPLATE_DEPS, (template_id,)
+        ).fetchall()
+        return result
+
+    def instantiate_template(
+        self, template_id: str, original_prompt: str, workspace_path: str = "."
+    ) -> str:
+        """Expand a template into a concrete pending pipeline."""
+        template = self.get_template(template_id)
+        if template is None:
+            raise ValueError(f"Unknown template: {template_id}")
+
+        pipeline_id = str(uuid.uuid4())
+        allowed_paths_json = orjson.dumps([workspace_path]).decode()
+        # One clock read + ISO format for the whole expansion; every row in
+        # the pipeline shares the same created_at rather than paying a
+        # datetime.now().isoformat() per INSERT tuple.
+        ts = self.db._timestamp()
+
+        stage_rows = []
+        stage_map: dict[str, str] = {}
+        for stage in template["stages"]:
+            stage_id = str(uuid.uuid4())
+            stage_map[stage["template_stage_id"]] = stage_id
+            stage_rows.append(
+                (
+                    stage_id,
+                    pipeline_id,
+                    stage["name"],
+                    stage["stage_order"],
+                    ts,
+                )
+            )
+
+        job_rows = []
+        job_map: dict[str, str] = {}
+        for stage in template["stages"]:
+            for template_job in stage["jobs"]:
+                if template_job["job_multiplier"]:
+                    continue  # spawned at runtime by the orchestrator
+                job_id = str(uuid.uuid4())
+                job_map[template_job["template_job_id"]] = job_id
+                prompt = _compile_template(template_job["prompt_template"] or "")(
+                    {"original_prompt": original_prompt}
+                )
+                command = template_job["command_template"]
+                if command:
+                    command = _compile_template(command)(
+                        {
+                            "job_id": job_id,
+                            "prompt": prompt,
+                            "agent_type": template_job["agent_type"],
+                        }
+                    )
+                job_rows.append(
+                    (
+                        job_id,
+                        pipeline_id,
+                        stage_map[template_job["template_stage_id"]],
+                        template_job["template_job_id"],
+                        template_job["agent_type"],
+                        prompt,
+                        command,
+                        allowed_paths_json,
+                        workspace_path,
+                        template_job["artifact_strategy"],
+                        ts,
+                    )
+                )
+
+        # UUIDs are generated client-side, so every row — including the
+        # dependency edges that reference job ids — exists before any SQL
+        # runs; the whole expansion lands in one immediate transaction
+        # (one fsync) as three executemany batches.
+        dep_rows = [
+            (job_map[dep["template_job_id"]],
+             job_map[dep["depends_on_template_job_id"]],
+             dep["dependency_type"])
+            for dep in template["dependencies"]
+            if dep["template_job_id"] in job_map
+            and dep["depends_on_template_job_id"] in job_map
+        ]
+
+        with self.db._write_lock, self.db.conn:
+            self.db.conn.execute("BEGIN IMMEDIATE")
+            self.db.conn.execute(
+                _SQL_INSERT_PIPELINE,
+                (pipeline_id, original_prompt, template_id, ts),
+            )
+            self.db.conn.executemany(_SQL_INSERT_STAGE, stage_rows)
+            self.db.conn.executemany(_SQL_INSERT_JOB, job_rows)
+            self.db.conn.executemany(_SQL_INSERT_JOB_DEP, dep_rows)
+        return pipeline_id
@@ -0,0 +1,199 @@
+"""Tool registry: the filesystem and text tools the agent may invoke.
+
+Every path argument is validated against the registry's allowed roots before
+any filesystem access happens.
+"""
+
+import fnmatch
+import functools
+import os
+import subprocess
+from collections import deque
+from pathlib import Path
+from typing import Any
+
+
+# Unbound string methods, bound once at module import: dispatch is a dict
+# hit plus a direct C call, with no per-invocation dict build or lambda
+# frame. The methods themselves already run as C table transforms.
+_TEXT_OPS = {
+    "uppercase": str.upper,
+    "lowercase": str.lower,
+    "title": str.title,
+    "strip": str.strip,
+}
+
+
+class ToolRegistry:
+    """Dispatches validated tool calls from the agent loop."""
+
+    def __init__(self, allowed_paths: list) -> None:
+        self.allowed_paths = [Path(p) for p in allowed_paths]
+        # Roots resolve once here; per-call validation is then pure string
+        # work. The trailing separator makes startswith() an exact
+        # is-under check (so /tmp/foo doesn't admit /tmp/foobar).
+        self._allowed_prefixes = [
+            str(p.resolve()) + os.sep for p in self.allowed_paths
+        ]
+        # Agent loops re-touch the same handful of files; the cache skips
+        # even the normpath on repeats. Per-instance so registries with
+        # different roots never share verdicts.
+        self._validate_path = functools.lru_cache(maxsize=1024)(
+            self._validate_path_uncached
+        )
+
+    # ------------------------------------------------------------------
+    # Path validation
+    # ------------------------------------------------------------------
+
+    def _validate_path_uncached(self, path: str) -> Path:
+        """Normalize *path* and ensure it falls under an allowed root.
+
+        String normalization plus a prefix check per root: no stat/
+        readlink syscalls from Path.resolve() and no ValueError control
+        flow on the miss path, both of which dominated tight read loops.
+        """
+        resolved = os.path.normpath(os.path.abspath(path))
+        for prefix in self._allowed_prefixes:
+            if resolved == prefix[:-1] or resolved.startswith(prefix):
+                return Path(resolved)
+        raise PermissionError(f"Path outside allowed roots: {path}")
+
+    # ------------------------------------------------------------------
+    # Tools
+    # ------------------------------------------------------------------
+
+    # Raw-fd I/O: one open, one read (or write loop), one decode — skips
+    # the TextIOWrapper buffering layers Path.read_text/write_text stack
+    # on every call, which adds up across a tight agent loop.
+
+    @staticmethod
+    def _read_bytes(p: Path) -> bytes:
+        fd = os.open(str(p), os.O_RDONLY)
+        try:
+            size = os.fstat(fd).st_size
+            data = os.read(fd, size)
+            if len(data) == size:  # one read suffices for nearly every file
+                return data
+            # os.read may return short (signals; Linux caps a single read
+            # around 2 GiB) — keep reading until EOF, like _write_bytes's
+            # short-write loop.
+            chunks = [data]
+            remaining = size - len(data)
+            while chunk := os.read(fd, remaining if remaining > 0 else 65536):
+                chunks.append(chunk)
+                remaining -= len(chunk)
+            return b"".join(chunks)
+        finally:
+            os.close(fd)
+
+    @staticmethod
+    def _write_bytes(p: Path, data: bytes, flags: int) -> None:
+        fd = os.open(str(p), flags, 0o644)
+        try:
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view):]
+        finally:
+            os.close(fd)
+
+    def read_file(self, path: str) -> str:
+        return self._read_bytes(self._validate_path(path)).decode("utf-8")
+
+    def write_file(self, path: str, content: str) -> str:
+        p = self._validate_path(path)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        self._write_bytes(
+            p, content.encode(), os.O_WRONLY | os.O_CREAT | os.O_TRUNC
+        )
+        return f"Wrote {len(content)} bytes to {path}"
+
+    def create_file(self, path: str, content: str = "") -> str:
+        p = self._validate_path(path)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        # O_EXCL makes existence-check-and-create one atomic syscall.
+        try:
+            self._write_bytes(
+                p, content.encode(), os.O_WRONLY | os.O_CREAT | os.O_EXCL
+            )
+        except FileExistsError:
+            raise FileExistsError(f"File already exists: {path}") from None
+        return f"Created {path}"
+
+    def list_directory(self, path: str = ".") -> list[str]:
+        p = self._validate_path(path)
+        return sorted(entry.name for entry in p.iterdir())
+
+    def find_files(self, pattern: str, path: str = ".", max_depth: int = 5) -> list[str]:
+        """Breadth-first scandir walk matching *pattern* against basenames.
+
+        One getdents pass per directory, with type information coming
+        from the scandir entries themselves; the old per-depth glob
+        expansion re-statted every intermediate directory once per
+        level. Hidden directories are skipped, and symlinked directories
+        are not followed, so cycles can't recurse.
+        """
+        root = str(self._validate_path(path))
+        matches: list[str] = []
+        pending = deque([(root, 0)])
+        while pending:
+            current, depth = pending.popleft()
+            try:
+                entries = os.scandir(current)
+            except OSError:
+                continue
+            with entries:
+                for entry in entries:
+                    if entry.is_file() and fnmatch.fnmatchcase(entry.name, pattern):
+                        matches.append(os.path.relpath(entry.path, root))
+                    elif (
+                        entry.is_dir(follow_symlinks=False)
+                        and depth < max_depth
+                        and not entry.name.startswith(".")
+                    ):
+                        pending.append((entry.path, depth + 1))
+        return sorted(matches)
+
+    def transform_text(self, text: str, operation: str) -> str:
+        fn = _TEXT_OPS.get(operation)
+        if fn is None:
+            raise ValueError(f"Unknown operation: {operation}")
+        return fn(text)
+
+    def run_command(self, command: str, timeout: int = 60) -> dict[str, Any]:
+        cwd = self.allowed_paths[0] if self.allowed_paths else Path.cwd()
+        result = subprocess.run(
+            command, shell=True, cwd=cwd, capture_output=True, text=True, timeout=timeout
+        )
+        return {
+            "returncode": result.returncode,
+            "stdout": result.stdout[-10_000:],
+            "stderr": result.stderr[-10_000:],
+        }
+
+    # ------------------------------------------------------------------
+    # Dispatch
+    # ------------------------------------------------------------------
+
+    _TOOLS = {
+        "read_file",
+        "write_file",
+        "create_file",
+        "list_directory",
+        "find_files",
+        "transform_text",
+        "run_command",
+    }
+
+    def describe(self) -> str:
+        return (
+            "read_file(path) | write_file(path, content) | create_file(path, content) | "
+            "list_directory(path) | find_files(pattern, path, max_depth) | "
+            "transform_text(text, operation) | run_command(command) | "
+            "finish(summary)"
+        )
+
+    def execute(self, tool: str, args: dict[str, Any]) -> Any:
+        if tool not in self._TOOLS:
+            raise ValueError(f"Unknown tool: {tool}")
+        return getattr(self, tool)(**args)
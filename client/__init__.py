@@ -0,0 +1 @@
+"""Clowder client: HTTP access to the API server for the TUI and tools."""
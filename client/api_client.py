@@ -0,0 +1,176 @@
+"""HTTP client for the Clowder API server, used by the TUI and CLI tools.
+
+All calls go through one persistent ``requests.Session``: urllib3 pools
+and reuses the underlying sockets, so a polling dashboard pays TCP setup
+once per server instead of once per request.
+"""
+
+from typing import Any, Iterator, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:  # Optional: C-level JSON decoding for the nested pipeline payloads.
+    import orjson
+except ImportError:  # pragma: no cover - stdlib decode still works
+    orjson = None
+
+try:  # Optional: large pipeline lists stream incrementally.
+    import ijson
+except ImportError:  # pragma: no cover - falls back to whole-body parsing
+    ijson = None
+
+DEFAULT_BASE_URL = "http://localhost:8400"
+
+
+def decode_json(response) -> Any:
+    """Decode a response body with orjson when available.
+
+    orjson.loads works straight off response.content, skipping the extra
+    UTF-8 str round-trip response.json() performs before parsing — the
+    dominant refresh cost for large pipeline lists.
+    """
+    if orjson is not None:
+        return orjson.loads(response.content)
+    return response.json()
+
+
+class ClowderAPIClient:
+    """Synchronous client over a pooled keep-alive session."""
+
+    def __init__(
+        self, base_url: str = DEFAULT_BASE_URL, timeout: float = 10.0
+    ) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self._session = requests.Session()
+        self._session.mount(
+            "http://", HTTPAdapter(pool_connections=4, pool_maxsize=8)
+        )
+        # Conditional-GET state for endpoints whose payloads rarely change
+        # between polls: last ETag and decoded body per URL.
+        self._etags: dict[str, str] = {}
+        self._bodies: dict[str, Any] = {}
+
+    def close(self) -> None:
+        self._session.close()
+
+    def __enter__(self) -> "ClowderAPIClient":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _cached_get(self, url: str) -> Any:
+        """GET with If-None-Match; a 304 reuses the cached decoded body.
+
+        Template metadata rarely changes, so most polls come back as a
+        header-only 304 and skip both the payload transfer and the JSON
+        decode. Requires the server to emit ETag headers; responses
+        without one degrade to plain GETs.
+        """
+        headers = {}
+        etag = self._etags.get(url)
+        if etag is not None:
+            headers["If-None-Match"] = etag
+        response = self._session.get(url, headers=headers, timeout=self.timeout)
+        if response.status_code == 304:
+            return self._bodies[url]
+        response.raise_for_status()
+        body = decode_json(response)
+        etag = response.headers.get("ETag")
+        if etag is not None:
+            self._etags[url] = etag
+            self._bodies[url] = body
+        return body
+
+    # ------------------------------------------------------------------
+    # Endpoints
+    # ------------------------------------------------------------------
+
+    def ping(self) -> bool:
+        try:
+            response = self._session.get(
+                f"{self.base_url}/ping", timeout=self.timeout
+            )
+            response.raise_for_status()
+        except requests.RequestException:
+            return False
+        return bool(decode_json(response).get("pong", False))
+
+    def fetch_templates(self) -> list[dict]:
+        return self._cached_get(f"{self.base_url}/templates")
+
+    def fetch_template_details(self, template_id: str) -> dict:
+        return self._cached_get(f"{self.base_url}/templates/{template_id}")
+
+    def start_pipeline(
+        self, template_id: str, prompt: str, workspace: Optional[str] = None
+    ) -> dict:
+        payload: dict[str, Any] = {"template_id": template_id, "prompt": prompt}
+        if workspace is not None:
+            payload["workspace"] = workspace
+        response = self._session.post(
+            f"{self.base_url}/pipelines", json=payload, timeout=self.timeout
+        )
+        response.raise_for_status()
+        return decode_json(response)
+
+    def fetch_pipeline(self, pipeline_id: str) -> dict:
+        response = self._session.get(
+            f"{self.base_url}/pipelines/{pipeline_id}", timeout=self.timeout
+        )
+        response.raise_for_status()
+        return decode_json(response)
+
+    def fetch_running_pipelines(self) -> list[dict]:
+        response = self._session.get(
+            f"{self.base_url}/pipelines", params={"status": "running"},
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        return decode_json(response)
+
+    def fetch_recent_pipelines(self, limit: int = 10) -> list[dict]:
+        response = self._session.get(
+            f"{self.base_url}/pipelines", params={"limit": limit},
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        return decode_json(response)
+
+    def iter_recent_pipelines(self, limit: int = 10) -> Iterator[dict]:
+        """Yield recent pipelines as they arrive off the wire.
+
+        With ijson, items parse straight from the raw socket stream —
+        parsing overlaps the transfer and peak memory stays at one
+        pipeline object instead of bytes-plus-objects for the whole
+        payload. Callers that only walk the top rows (the usual TUI
+        case) can stop early and never pull the rest. Falls back to
+        fetch_recent_pipelines when ijson is unavailable.
+        """
+        if ijson is None:
+            yield from self.fetch_recent_pipelines(limit)
+            return
+        with self._session.get(
+            f"{self.base_url}/pipelines", params={"limit": limit},
+            stream=True, timeout=self.timeout,
+        ) as response:
+            response.raise_for_status()
+            yield from ijson.items(response.raw, "item")
+
+    def fetch_dashboard(self, recent_limit: int = 10) -> dict:
+        """Everything a dashboard refresh needs, in one round-trip.
+
+        Returns ``{"pong": bool, "running": [...], "recent": [...],
+        "templates": [...]}`` — the server assembles all four payloads in
+        a single transaction, replacing the four separate requests (and
+        four RTTs) a refresh tick used to cost.
+        """
+        response = self._session.get(
+            f"{self.base_url}/dashboard",
+            params={"recent_limit": recent_limit},
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        return decode_json(response)
@@ -0,0 +1,90 @@
+"""Async variant of the Clowder API client for concurrent dashboard polling.
+
+Mirrors ClowderAPIClient's surface with ``async def`` methods over a
+single httpx.AsyncClient, so a refresh tick can ``asyncio.gather`` the
+running/recent/templates fetches and overlap their round-trips instead
+of serializing them.
+"""
+
+from typing import Any, Optional
+
+import httpx
+
+from .api_client import DEFAULT_BASE_URL, decode_json
+
+
+class AsyncClowderAPIClient:
+    """Async client over one shared httpx.AsyncClient connection pool."""
+
+    def __init__(
+        self, base_url: str = DEFAULT_BASE_URL, timeout: float = 10.0
+    ) -> None:
+        self._client = httpx.AsyncClient(
+            base_url=base_url.rstrip("/"), timeout=timeout
+        )
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+    async def __aenter__(self) -> "AsyncClowderAPIClient":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
+
+    # ------------------------------------------------------------------
+    # Endpoints
+    # ------------------------------------------------------------------
+
+    async def ping(self) -> bool:
+        try:
+            response = await self._client.get("/ping")
+            response.raise_for_status()
+        except httpx.HTTPError:
+            return False
+        return bool(decode_json(response).get("pong", False))
+
+    async def fetch_templates(self) -> list[dict]:
+        response = await self._client.get("/templates")
+        response.raise_for_status()
+        return decode_json(response)
+
+    async def fetch_template_details(self, template_id: str) -> dict:
+        response = await self._client.get(f"/templates/{template_id}")
+        response.raise_for_status()
+        return decode_json(response)
+
+    async def start_pipeline(
+        self, template_id: str, prompt: str, workspace: Optional[str] = None
+    ) -> dict:
+        payload: dict[str, Any] = {"template_id": template_id, "prompt": prompt}
+        if workspace is not None:
+            payload["workspace"] = workspace
+        response = await self._client.post("/pipelines", json=payload)
+        response.raise_for_status()
+        return decode_json(response)
+
+    async def fetch_pipeline(self, pipeline_id: str) -> dict:
+        response = await self._client.get(f"/pipelines/{pipeline_id}")
+        response.raise_for_status()
+        return decode_json(response)
+
+    async def fetch_running_pipelines(self) -> list[dict]:
+        response = await self._client.get(
+            "/pipelines", params={"status": "running"}
+        )
+        response.raise_for_status()
+        return decode_json(response)
+
+    async def fetch_recent_pipelines(self, limit: int = 10) -> list[dict]:
+        response = await self._client.get("/pipelines", params={"limit": limit})
+        response.raise_for_status()
+        return decode_json(response)
+
+    async def fetch_dashboard(self, recent_limit: int = 10) -> dict:
+        """One-round-trip counterpart of ClowderAPIClient.fetch_dashboard."""
+        response = await self._client.get(
+            "/dashboard", params={"recent_limit": recent_limit}
+        )
+        response.raise_for_status()
+        return decode_json(response)
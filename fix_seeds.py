@@ -0,0 +1,37 @@
+"""One-shot migration: add the NULL job_multiplier column to seed INSERTs.
+
+Rewrites ``INSERT INTO template_jobs VALUES (...)`` rows in a seed SQL file
+so a NULL lands between the prompt template and the trailing integer pair.
+The ``{4}`` repetition anchors the match to exactly four leading values, so
+the row-shape check happens inside the regex engine — rows that already
+carry the extra column simply don't match and pass through untouched.
+"""
+
+import re
+import sys
+from pathlib import Path
+
+PAT = re.compile(
+    r"(INSERT INTO template_jobs VALUES \((?:[^,)]+,){4}\s*)"
+    r"'([^']*)',\s*(\d+),\s*(\d+)\s*\);"
+)
+
+
+def fix_seed_sql(content: str) -> str:
+    return PAT.sub(lambda m: f"{m[1]}'{m[2]}',\n    NULL,\n    {m[3]}, {m[4]});", content)
+
+
+def main(argv: list[str]) -> int:
+    path = Path(argv[1]) if len(argv) > 1 else Path("seed_templates.sql")
+    content = path.read_text(encoding="utf-8")
+    fixed = fix_seed_sql(content)
+    if fixed != content:
+        path.write_text(fixed, encoding="utf-8")
+        print(f"Rewrote {path}")
+    else:
+        print(f"No changes needed in {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv))
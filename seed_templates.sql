@@ -0,0 +1,32 @@
+-- Seed data for test_templates.py: one ready-made template with two
+-- stages, two jobs, and a dependency edge.
+--
+-- The whole seed runs as one transaction: executescript executes in
+-- autocommit mode, so without the explicit BEGIN every INSERT would pay
+-- its own implicit transaction and fsync.
+BEGIN;
+
+INSERT INTO templates (template_id, name, description, created_at)
+VALUES ('tmpl-seeded', 'seeded-pipeline', 'Plan/execute template from seed SQL',
+        datetime('now'));
+
+INSERT INTO template_stages (template_stage_id, template_id, name, stage_order)
+VALUES
+    ('tstage-seeded-plan', 'tmpl-seeded', 'plan', 0),
+    ('tstage-seeded-execute', 'tmpl-seeded', 'execute', 1);
+
+INSERT INTO template_jobs (template_job_id, template_stage_id, agent_type,
+                           prompt_template, command_template, job_multiplier,
+                           artifact_strategy)
+VALUES
+    ('tjob-seeded-planner', 'tstage-seeded-plan', 'simple',
+     'Plan the work for: {{original_prompt}}', NULL, NULL, NULL),
+    ('tjob-seeded-worker', 'tstage-seeded-execute', 'simple',
+     'Execute the plan for: {{original_prompt}}', NULL, NULL, NULL);
+
+INSERT INTO template_job_dependencies (template_job_id,
+                                       depends_on_template_job_id,
+                                       dependency_type)
+VALUES ('tjob-seeded-worker', 'tjob-seeded-planner', 'success');
+
+COMMIT;
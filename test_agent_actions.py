@@ -0,0 +1,94 @@
+"""Exercise Agent._execute_actions without a model.
+
+Feeds hand-built LLMResponse objects straight into the action executor
+over a throwaway workspace, covering the response shapes the loop must
+handle: a single action (the most common model reply), a leading
+parallel run, a dependent {{actions[N]}} chain, and a finish action.
+Run directly: ``python test_agent_actions.py``.
+"""
+
+import os
+import shutil
+import tempfile
+
+from agents.agent import Agent
+from agents.schema import Action, LLMResponse
+from agents.tools import ToolRegistry
+
+
+def build_agent(workspace: str) -> Agent:
+    return Agent(
+        task="exercise the executor",
+        tool_registry=ToolRegistry([workspace]),
+        cache_path=os.path.join(workspace, ".agent_cache.db"),
+    )
+
+
+def main() -> int:
+    workspace = tempfile.mkdtemp(prefix="agent_actions_")
+    agent = build_agent(workspace)
+    target = os.path.join(workspace, "a.txt")
+    failures = []
+
+    def check(name: str, condition: bool) -> None:
+        print(f"{name}: {'ok' if condition else 'FAIL'}")
+        if not condition:
+            failures.append(name)
+
+    # One independent action — must execute, not fall between the
+    # parallel gate and the sequential slice.
+    results = agent._execute_actions(
+        LLMResponse(actions=[
+            Action(tool="write_file", args={"path": target, "content": "one"}),
+        ])
+    )
+    check(
+        "single action",
+        len(results) == 1
+        and results[0]["status"] == "success"
+        and open(target).read() == "one",
+    )
+
+    # Leading independent pair runs through the pool; both land.
+    results = agent._execute_actions(
+        LLMResponse(actions=[
+            Action(tool="read_file", args={"path": target}),
+            Action(tool="list_directory", args={"path": workspace}),
+        ])
+    )
+    check(
+        "parallel pair",
+        [r["status"] for r in results] == ["success", "success"]
+        and results[0]["result"] == "one",
+    )
+
+    # read + dependent write: the read executes and its result resolves
+    # into the write's {{actions[0]}} reference.
+    chained = os.path.join(workspace, "b.txt")
+    results = agent._execute_actions(
+        LLMResponse(actions=[
+            Action(tool="read_file", args={"path": target}),
+            Action(tool="write_file",
+                   args={"path": chained, "content": "got {{actions[0]}}"}),
+        ])
+    )
+    check(
+        "dependent chain",
+        len(results) == 2 and open(chained).read() == "got one",
+    )
+
+    # A lone finish carries its payload through.
+    results = agent._execute_actions(
+        LLMResponse(actions=[Action(tool="finish", args={"summary": "done"})])
+    )
+    check(
+        "finish action",
+        len(results) == 1 and results[0]["result"].get("__FINISH__") is True,
+    )
+
+    shutil.rmtree(workspace)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
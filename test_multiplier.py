@@ -0,0 +1,132 @@
+"""Action-sourced multiplier exercise: finish tasks fan out into jobs.
+
+Builds a planner → worker template where the worker multiplies over the
+planner's finish action, logs a harness-shaped action row (reasoning in
+llm_response, tool results in results) for the planner, and checks that
+check_and_spawn_multiplied_jobs spawns one worker per finish task.
+Run directly: ``python test_multiplier.py``.
+"""
+
+import orjson
+
+from agents.db import ClowderDB
+from agents.orchestrator import (
+    _finish_action_tasks,
+    check_and_spawn_multiplied_jobs,
+)
+from agents.templates import TemplateManager
+
+DB_PATH = "test_multiplier.db"
+
+TASKS = ["refactor parser", "add tests", "update docs"]
+
+
+def build_template(manager: TemplateManager, db: ClowderDB) -> str:
+    template_id = manager.create_template(
+        "fan-out-pipeline",
+        "planner whose finish tasks multiply into worker jobs",
+        [
+            {
+                "name": "plan",
+                "jobs": [
+                    {
+                        "name": "planner",
+                        "agent_type": "mock",
+                        "prompt_template": "Plan: {{original_prompt}}",
+                    }
+                ],
+            },
+            {
+                "name": "work",
+                "jobs": [
+                    {
+                        "name": "worker",
+                        "agent_type": "mock",
+                        "prompt_template": "Do task {{index}}: {{item}}",
+                        # source_template_job_id is filled in below once the
+                        # planner's generated id is known.
+                        "job_multiplier": {"source_type": "action"},
+                    }
+                ],
+            },
+        ],
+    )
+    planner = db.conn.execute(
+        "SELECT tj.template_job_id FROM template_jobs tj "
+        "JOIN template_stages ts ON ts.template_stage_id = tj.template_stage_id "
+        "WHERE ts.template_id = ? AND ts.stage_order = 0",
+        (template_id,),
+    ).fetchone()
+    multiplier = orjson.dumps(
+        {"source_type": "action", "source_template_job_id": planner["template_job_id"]}
+    ).decode()
+    with db._write_lock, db.conn:
+        db.conn.execute(
+            "UPDATE template_jobs SET job_multiplier = ? "
+            "WHERE job_multiplier IS NOT NULL AND template_stage_id IN "
+            "(SELECT template_stage_id FROM template_stages WHERE template_id = ?)",
+            (multiplier, template_id),
+        )
+    return template_id
+
+
+def main() -> int:
+    with ClowderDB.acquire(DB_PATH) as db:
+        manager = TemplateManager(db)
+        template_id = build_template(manager, db)
+        manager.instantiate_template(template_id, "ship the feature")
+
+        planner_job = db.conn.execute("SELECT job_id FROM jobs").fetchone()
+        job_id = planner_job["job_id"]
+
+        # Harness shape: llm_response carries only the model's reasoning;
+        # the finish action's payload lives in the results column.
+        db.log_action(
+            job_id,
+            1,
+            "split the feature into tasks",
+            [
+                {"tool": "read_file", "status": "success", "result": "notes"},
+                {
+                    "tool": "finish",
+                    "status": "success",
+                    "result": {"__FINISH__": True, "tasks": TASKS},
+                },
+            ],
+        )
+        with db._write_lock, db.conn:
+            db.conn.execute(
+                "UPDATE jobs SET status = 'completed' WHERE job_id = ?", (job_id,)
+            )
+
+        tasks_json = _finish_action_tasks(db, job_id)
+        extracted = orjson.loads(tasks_json) if tasks_json else None
+        print(f"finish tasks: {extracted}")
+
+        spawned = check_and_spawn_multiplied_jobs(db, job_id)
+        prompts = [
+            row["prompt"]
+            for row in db.conn.execute(
+                "SELECT prompt FROM jobs WHERE parent_job_id = ? ORDER BY prompt",
+                (job_id,),
+            )
+        ]
+        print(f"spawned {len(spawned)} worker jobs:")
+        for prompt in prompts:
+            print(f"  {prompt}")
+
+        # A second completion event must not re-spawn the batch.
+        respawned = check_and_spawn_multiplied_jobs(db, job_id)
+
+        ok = (
+            extracted == TASKS
+            and len(spawned) == len(TASKS)
+            and all(task in "".join(prompts) for task in TASKS)
+            and respawned == []
+        )
+    print("OK" if ok else "FAILED")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
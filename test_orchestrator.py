@@ -0,0 +1,120 @@
+"""End-to-end orchestrator exercise using mock agents.
+
+Builds a plan/work/verify template whose jobs run the mock agent, expands
+it into a pipeline, drives it with a real Orchestrator on a background
+thread, and prints pipeline/job status until it reaches a terminal state.
+Run directly: ``python test_orchestrator.py``.
+"""
+
+import sys
+import threading
+import time
+
+from agents.db import ClowderDB, ReadPool
+from agents.orchestrator import Orchestrator
+from agents.templates import TemplateManager
+
+DB_PATH = "test_orchestrator.db"
+
+MOCK = f"{sys.executable} -m agents.mock_agent"
+
+# Monitor SQL prepared once at module scope, not rebuilt inside the
+# polling loop; each tick only rebinds the pipeline id. One rollup query
+# carries the pipeline status on every job row, so a tick costs a single
+# parse/plan/step instead of two queries sharing the pipeline_id scan.
+_SQL_STATUS_ROLLUP = (
+    "WITH p AS (SELECT status FROM pipelines WHERE pipeline_id = ?) "
+    "SELECT (SELECT status FROM p) AS pipeline_status, "
+    "j.agent_type, j.status, s.name AS stage_name "
+    "FROM jobs j JOIN stages s ON j.stage_id = s.stage_id "
+    "WHERE j.pipeline_id = ? ORDER BY s.stage_order"
+)
+
+
+def build_template(manager: TemplateManager) -> str:
+    return manager.create_template(
+        "mock-pipeline",
+        "plan/work/verify smoke pipeline on mock agents",
+        [
+            {
+                "name": "plan",
+                "jobs": [
+                    {
+                        "name": "planner",
+                        "agent_type": "mock",
+                        "command_template": f"{MOCK} --duration 0.2 --output planned",
+                    }
+                ],
+            },
+            {
+                "name": "work",
+                "jobs": [
+                    {
+                        "name": "worker",
+                        "agent_type": "mock",
+                        "command_template": f"{MOCK} --duration 0.2 --output worked",
+                        "depends_on": ["planner"],
+                    }
+                ],
+            },
+            {
+                "name": "verify",
+                "jobs": [
+                    {
+                        "name": "verifier",
+                        "agent_type": "mock",
+                        "command_template": f"{MOCK} --duration 0.2 --output verified",
+                        "depends_on": ["worker"],
+                    }
+                ],
+            },
+        ],
+    )
+
+
+def main() -> int:
+    # acquire() parks the instance between phases: the orchestrator phase
+    # gets the same ClowderDB back — schema check and PRAGMAs already
+    # applied — instead of a close + cold re-open.
+    with ClowderDB.acquire(DB_PATH) as db:
+        manager = TemplateManager(db)
+        template_id = build_template(manager)
+        pipeline_id = manager.instantiate_template(template_id, "smoke test", ".")
+    print(f"pipeline: {pipeline_id}")
+
+    with ClowderDB.acquire(DB_PATH) as db:
+        orchestrator = Orchestrator(db, poll_interval=1.0)
+        thread = threading.Thread(target=orchestrator.start, daemon=True)
+        thread.start()
+
+        # The orchestrator thread keeps the sole write connection; the
+        # monitor reads over read-only pool connections and sleeps on the
+        # orchestrator's condition variable, so each status query runs
+        # right after a real transition instead of on a fixed 2s poll.
+        pool = ReadPool(DB_PATH, size=2)
+        status = "running"
+        deadline = time.monotonic() + 30
+        try:
+            while time.monotonic() < deadline:
+                orchestrator.wait_for_change(timeout=5)
+                with pool.read() as conn:
+                    jobs = conn.execute(
+                        _SQL_STATUS_ROLLUP, (pipeline_id, pipeline_id)
+                    ).fetchall()
+                if jobs:
+                    status = jobs[0]["pipeline_status"]
+                summary = ", ".join(f"{j['stage_name']}:{j['status']}" for j in jobs)
+                print(f"pipeline={status} [{summary}]")
+                if status in ("completed", "failed"):
+                    break
+        finally:
+            orchestrator.stop()
+            thread.join(timeout=10)
+            pool.close()
+
+    print(f"final: {status}")
+    return 0 if status == "completed" else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
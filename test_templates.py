@@ -0,0 +1,117 @@
+"""Template-manager exercise: seed templates, instantiate, and inspect.
+
+Applies the seed SQL on top of the standard schema, creates a second
+template through TemplateManager, instantiates both into pipelines, and
+prints what landed in the pipeline/stage/job tables. Run directly:
+``python test_templates.py``.
+"""
+
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+from agents.db import ClowderDB
+from agents.templates import TemplateManager
+
+DB_PATH = "test_templates.db"
+SEED_FILE = Path(__file__).parent / "seed_templates.sql"
+
+
+def build_custom_template(manager: TemplateManager) -> str:
+    return manager.create_template(
+        "custom-pipeline",
+        "Two-stage template built through TemplateManager",
+        [
+            {
+                "name": "gather",
+                "jobs": [
+                    {
+                        "name": "collector",
+                        "agent_type": "simple",
+                        "prompt_template": "Collect inputs for: {{original_prompt}}",
+                    }
+                ],
+            },
+            {
+                "name": "report",
+                "jobs": [
+                    {
+                        "name": "reporter",
+                        "agent_type": "simple",
+                        "prompt_template": "Summarize results for: {{original_prompt}}",
+                        "depends_on": ["collector"],
+                    }
+                ],
+            },
+        ],
+    )
+
+
+# One acyclic JOIN instead of a pipeline query plus a stages query plus
+# one jobs query per stage: a single prepare/step/reset cycle returns
+# every row, and Python buckets them by stage. Kept as a module constant:
+# sqlite3's statement cache (cached_statements=256 on every ClowderDB
+# connection) keys on the SQL text, so both pipeline inspections reuse
+# the one prepared statement instead of re-parsing per call.
+_SQL_PIPELINE_TREE = (
+    "SELECT p.pipeline_id, p.original_prompt, p.status, "
+    "s.stage_order, s.name AS stage_name, j.agent_type, j.prompt "
+    "FROM pipelines p "
+    "LEFT JOIN stages s ON s.pipeline_id = p.pipeline_id "
+    "LEFT JOIN jobs j ON j.stage_id = s.stage_id "
+    "WHERE p.pipeline_id = ? ORDER BY s.stage_order"
+)
+
+
+def inspect_pipeline(db: ClowderDB, pipeline_id: str) -> None:
+    rows = db.conn.execute(_SQL_PIPELINE_TREE, (pipeline_id,)).fetchall()
+    if not rows:
+        print(f"pipeline {pipeline_id}: not found")
+        return
+    first = rows[0]
+    print(f"pipeline {first['pipeline_id']}: {first['status']} "
+          f"({first['original_prompt']})")
+    stages: defaultdict[int, list] = defaultdict(list)
+    stage_names = {}
+    for row in rows:
+        if row["stage_order"] is None:
+            continue
+        stage_names[row["stage_order"]] = row["stage_name"]
+        if row["agent_type"] is not None:
+            stages[row["stage_order"]].append(row)
+    for order in sorted(stage_names):
+        print(f"  stage {order}: {stage_names[order]}")
+        for job in stages[order]:
+            print(f"    job {job['agent_type']}: {job['prompt']!r}")
+
+
+def main() -> int:
+    # ClowderDB applies the schema and the WAL/synchronous=NORMAL PRAGMAs
+    # on open; the seed script carries its own BEGIN/COMMIT, so the whole
+    # seed lands in one transaction (one fsync) instead of an implicit
+    # autocommit per INSERT.
+    db = ClowderDB(DB_PATH)
+    db.conn.executescript(SEED_FILE.read_text(encoding="utf-8"))
+
+    manager = TemplateManager(db)
+    custom_template_id = build_custom_template(manager)
+
+    pipeline_id = manager.instantiate_template(
+        "tmpl-seeded", "refactor the parser", "."
+    )
+    custom_pipeline_id = manager.instantiate_template(
+        custom_template_id, "summarize the logs", "."
+    )
+
+    templates = manager.list_templates()
+    print(f"templates: {[row['name'] for row in templates]}")
+    inspect_pipeline(db, pipeline_id)
+    inspect_pipeline(db, custom_pipeline_id)
+
+    ok = len(templates) == 2
+    db.close()
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
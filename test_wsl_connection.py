@@ -0,0 +1,138 @@
+"""Probe the WSL + Ollama setup used to host the local model.
+
+Checks, in order: that WSL itself answers, that the ollama binary is on
+its PATH, that the default model is pulled, and that a trivial inference
+round-trips. All probes share one long-lived ``wsl bash`` process — on
+Windows each fresh ``wsl.exe`` spawn costs hundreds of milliseconds of
+process creation plus VM entry, which dominated the old one-subprocess-
+per-probe version. Run directly: ``python test_wsl_connection.py``.
+"""
+
+import queue
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_MODEL = "qwen2.5-coder:7b"
+
+
+class WSLShell:
+    """One persistent WSL bash session shared by every probe.
+
+    Commands stream through the shell's stdin; a sentinel echo after each
+    command marks where its output ends and carries its exit status, so
+    callers get (output, returncode) without a new process per command.
+    """
+
+    def __init__(self, argv: tuple[str, ...] = ("wsl", "bash")) -> None:
+        self._proc = subprocess.Popen(
+            list(argv),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+        )
+        self._seq = 0
+        # stdout is consumed on a daemon thread feeding this queue, so
+        # run() can wait with a deadline instead of blocking in readline()
+        # forever when a probe hangs.
+        self._lines: queue.Queue = queue.Queue()
+        self._reader = threading.Thread(target=self._pump_stdout, daemon=True)
+        self._reader.start()
+
+    def _pump_stdout(self) -> None:
+        for line in self._proc.stdout:
+            self._lines.put(line)
+        self._lines.put(None)  # EOF: the shell exited.
+
+    def run(self, command: str, timeout: float = 120) -> tuple[str, int]:
+        self._seq += 1
+        marker = f"__DONE_{self._seq}__"
+        self._proc.stdin.write(f"{command}\necho {marker} $?\n")
+        self._proc.stdin.flush()
+        deadline = time.monotonic() + timeout
+        lines = []
+        while True:
+            try:
+                line = self._lines.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                # The session is mid-command and unusable; kill it rather
+                # than leave the hung probe holding the shell.
+                self._proc.kill()
+                raise TimeoutError(
+                    f"command did not finish within {timeout}s: {command!r}"
+                ) from None
+            if line is None:
+                raise RuntimeError("WSL shell exited unexpectedly")
+            if line.startswith(marker):
+                returncode = int(line.split()[1])
+                return "".join(lines), returncode
+            lines.append(line)
+
+    def close(self) -> None:
+        if self._proc.poll() is None:
+            self._proc.stdin.close()
+            self._proc.wait(timeout=10)
+        self._reader.join(timeout=5)
+
+    def __enter__(self) -> "WSLShell":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def test_wsl(shell: WSLShell) -> bool:
+    output, returncode = shell.run("uname -a")
+    print(f"WSL: {'ok' if returncode == 0 else 'FAIL'} ({output.strip()})")
+    return returncode == 0
+
+
+def test_ollama(shell: WSLShell) -> bool:
+    output, returncode = shell.run("which ollama")
+    print(f"ollama binary: {'ok' if returncode == 0 else 'FAIL'} ({output.strip()})")
+    return returncode == 0
+
+
+def test_model(shell: WSLShell, model: str = DEFAULT_MODEL) -> bool:
+    output, returncode = shell.run("ollama list")
+    found = returncode == 0 and model in output
+    print(f"model {model}: {'ok' if found else 'FAIL'}")
+    return found
+
+
+def test_inference(shell: WSLShell, model: str = DEFAULT_MODEL) -> bool:
+    output, returncode = shell.run(f"ollama run {model} 'Reply with the word: pong'")
+    ok = returncode == 0 and "pong" in output.lower()
+    print(f"inference: {'ok' if ok else 'FAIL'}")
+    return ok
+
+
+def main() -> int:
+    # Only test_inference depends on test_model; the first two probes are
+    # independent, so they run concurrently on their own shells —
+    # overlapping the WSL VM-entry latency that dominates each probe. A
+    # shell's stdin pipe is a serial channel, so each parallel branch gets
+    # its own session rather than interleaving on one.
+    try:
+        with WSLShell() as wsl_shell, WSLShell() as ollama_shell:
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                wsl_ok = pool.submit(test_wsl, wsl_shell)
+                ollama_ok = pool.submit(test_ollama, ollama_shell)
+                if not (wsl_ok.result() and ollama_ok.result()):
+                    return 1
+            if not test_model(ollama_shell):
+                return 1
+            if not test_inference(ollama_shell):
+                return 1
+    except FileNotFoundError:
+        print("wsl not found on PATH — is this a Windows host with WSL installed?")
+        return 1
+    print("all WSL probes passed")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())